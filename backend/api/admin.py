@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Candidate, JobDescription, AnalysisJob
+from .models import Candidate, JobDescription, AnalysisJob, AnalysisItem, ResumeFile, ResumeAnalysis
 
 
 @admin.register(Candidate)
@@ -22,3 +22,22 @@ class AnalysisJobAdmin(admin.ModelAdmin):
     list_display = ['id', 'status', 'total_resumes', 'processed_resumes', 'shortlisted_count', 'created_at']
     list_filter = ['status', 'created_at']
     ordering = ['-created_at']
+
+
+@admin.register(ResumeFile)
+class ResumeFileAdmin(admin.ModelAdmin):
+    list_display = ['file_name', 'content_hash', 'size', 'updated_at']
+    search_fields = ['file_name', 'path', 'content_hash']
+
+
+@admin.register(ResumeAnalysis)
+class ResumeAnalysisAdmin(admin.ModelAdmin):
+    list_display = ['resume', 'job_description', 'candidate', 'analyzed_at']
+    list_filter = ['job_description']
+
+
+@admin.register(AnalysisItem)
+class AnalysisItemAdmin(admin.ModelAdmin):
+    list_display = ['analysis_job', 'resume', 'state', 'attempts', 'updated_at']
+    list_filter = ['state']
+    search_fields = ['resume__file_name', 'last_error']
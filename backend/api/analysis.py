@@ -0,0 +1,773 @@
+"""
+Resume analysis helpers shared by the API views.
+"""
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from openai import OpenAI
+from dotenv import load_dotenv
+from .models import Candidate, JobDescription, AnalysisJob, AnalysisItem, ResumeFile, ResumeAnalysis
+from src.extractor.pdf_reader import extract_text, file_sha256, inspect_document
+from src.extractor.batch_reader import iter_extract_documents
+from src.core.scoring_engine import ScoringEngine
+from src.core.prefilter import prescore_resumes, select_for_scoring
+from src.core.estimator import estimate_run
+from src.core.batch_scoring import submit_batch, get_batch, fetch_batch_results, BATCH_DONE_STATES
+from src.core.score_cache import text_sha256
+from src.utils.metrics import inc, observe
+from . import events
+
+load_dotenv()
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Delete PDFs from the resume folders after a run (off: runs are incremental)
+CLEAR_RESUMES_AFTER_ANALYSIS = os.getenv("CLEAR_RESUMES_AFTER_ANALYSIS", "0") == "1"
+
+# batch_status of a finished batch job whose output one poller has claimed for ingesting,
+# and seconds after which a claim left by a crashed poller can be taken over
+BATCH_INGESTING = 'ingesting'
+BATCH_INGEST_STALE_SECONDS = int(os.getenv("BATCH_INGEST_STALE_SECONDS", "900"))
+
+# Candidates persisted per bulk write, and how often job progress is flushed (seconds / rows)
+ANALYSIS_WRITE_CHUNK = max(1, int(os.getenv("ANALYSIS_WRITE_CHUNK", "100")))
+PROGRESS_FLUSH_SECONDS = float(os.getenv("ANALYSIS_PROGRESS_SECONDS", "2"))
+PROGRESS_FLUSH_ROWS = max(1, int(os.getenv("ANALYSIS_PROGRESS_ROWS", "25")))
+
+# AnalysisJob counters written by progress flushes
+PROGRESS_FIELDS = [
+    'total_resumes', 'processed_resumes', 'shortlisted_count', 'prefiltered_count', 'unchanged_count',
+    'prompt_tokens', 'completion_tokens', 'cached_tokens', 'estimated_cost'
+]
+
+# AnalysisItem fields written at each checkpoint
+ITEM_FIELDS = ['state', 'prescore', 'attempts', 'last_error', 'updated_at']
+
+# Candidate fields refreshed when a resume is re-analysed
+RESULT_FIELDS = [
+    'candidate_name', 'email', 'phone', 'years_of_experience', 'score', 'fitness_reasoning',
+    'matching_skills', 'missing_skills', 'verdict', 'resume_file', 'prescore',
+    'prompt_tokens', 'completion_tokens', 'estimated_cost'
+]
+
+# Statuses set by HR that a re-analysis must not overwrite
+MANUAL_STATUSES = ('notified', 'appointed')
+
+
+def resume_folders():
+    """Folders scanned for resumes: Drive sync and manual upload."""
+    return [
+        settings.BASE_DIR / "data" / "resumes",
+        settings.BASE_DIR / "data" / "local_upload"
+    ]
+
+
+def get_jd_text(jd):
+    """Return the stored text of a JobDescription, extracting and storing it on first use."""
+    if not jd.extracted_text:
+        refresh_jd_text(jd)
+    return jd.extracted_text
+
+
+def refresh_jd_text(jd):
+    """Extract a JobDescription's text again and store it."""
+    jd.extracted_text = build_jd_text(jd) or ''
+    JobDescription.objects.filter(id=jd.id).update(extracted_text=jd.extracted_text)
+    return jd.extracted_text
+
+
+def build_jd_text(jd):
+    """Extract the text of a JobDescription, from its PDF if available."""
+    if jd.file_path and Path(jd.file_path).exists():
+        return extract_text(jd.file_path)
+    return f"{jd.title}\n\n{jd.description}\n\nRequirements:\n{jd.requirements}"
+
+
+def sync_resume_files(paths):
+    """
+    Record resume PDFs in the database by path and content hash.
+
+    Files whose size and mtime are unchanged keep their stored hash, so only
+    new or modified files are read.
+
+    Args:
+        paths: List of resume Paths
+
+    Returns:
+        List of ResumeFile rows, aligned with paths
+    """
+    known = {row.path: row for row in ResumeFile.objects.filter(path__in=[str(path) for path in paths])}
+    rows = []
+    for path in paths:
+        stat = path.stat()
+        row = known.get(str(path))
+        if row is None or row.size != stat.st_size or row.modified_at != stat.st_mtime:
+            if row is None:
+                row = ResumeFile(path=str(path), file_name=path.name)
+            row.content_hash = file_sha256(path)
+            row.size = stat.st_size
+            row.modified_at = stat.st_mtime
+            row.save()
+        rows.append(row)
+    return rows
+
+
+def select_changed_resumes(resumes, jd, jd_hash):
+    """Return the resumes not yet analysed in their current version against this JD text."""
+    analysed = set(
+        ResumeAnalysis.objects.filter(resume__in=resumes, job_description=jd, jd_hash=jd_hash)
+        .values_list('resume_id', 'content_hash')
+    )
+    return [resume for resume in resumes if (resume.id, resume.content_hash) not in analysed]
+
+
+def save_candidates(pairs, jd, jd_hash):
+    """
+    Persist analysis results in bulk and mark the resumes as analysed against the JD.
+
+    Resumes analysed against the JD before update their existing Candidate
+    in place instead of creating a duplicate. Everything is written in one
+    transaction with bulk_create/bulk_update.
+
+    Args:
+        pairs: List of (unsaved Candidate, ResumeFile)
+        jd: JobDescription the resumes were analysed against
+        jd_hash: Hash of the JD text used
+
+    Returns:
+        List of saved Candidates, aligned with pairs
+    """
+    if not pairs:
+        return []
+
+    now = timezone.now()
+    with transaction.atomic():
+        markers = {
+            marker.resume_id: marker
+            for marker in ResumeAnalysis.objects.filter(
+                resume__in=[resume for _, resume in pairs], job_description=jd
+            ).select_related('candidate')
+        }
+
+        saved, created, updated = [], [], []
+        for candidate, resume in pairs:
+            marker = markers.get(resume.id)
+            existing = marker.candidate if marker else None
+            if existing:
+                for field in RESULT_FIELDS:
+                    setattr(existing, field, getattr(candidate, field))
+                if existing.status not in MANUAL_STATUSES:
+                    existing.status = candidate.status
+                existing.updated_at = now
+                updated.append(existing)
+                candidate = existing
+            else:
+                candidate.job_description = jd
+                created.append(candidate)
+            saved.append(candidate)
+
+        Candidate.objects.bulk_create(created)
+        Candidate.objects.bulk_update(updated, RESULT_FIELDS + ['status', 'updated_at'])
+
+        new_markers, changed_markers = [], []
+        for candidate, (_, resume) in zip(saved, pairs):
+            marker = markers.get(resume.id)
+            if marker is None:
+                new_markers.append(ResumeAnalysis(
+                    resume=resume, job_description=jd, candidate=candidate,
+                    content_hash=resume.content_hash, jd_hash=jd_hash
+                ))
+            else:
+                marker.candidate = candidate
+                marker.content_hash = resume.content_hash
+                marker.jd_hash = jd_hash
+                marker.analyzed_at = now
+                changed_markers.append(marker)
+
+        ResumeAnalysis.objects.bulk_create(new_markers)
+        ResumeAnalysis.objects.bulk_update(changed_markers, ['candidate', 'content_hash', 'jd_hash', 'analyzed_at'])
+
+    return saved
+
+
+def job_summary(analysis_job):
+    """Progress snapshot of a job, as sent in stream events."""
+    return {
+        'job_id': analysis_job.id,
+        'status': analysis_job.status,
+        'error_message': analysis_job.error_message,
+        **{field: getattr(analysis_job, field) for field in PROGRESS_FIELDS}
+    }
+
+
+def finish_job(analysis_job, status, error_message=''):
+    """Mark a job completed or failed and publish the final stream event."""
+    analysis_job.status = status
+    if error_message:
+        analysis_job.error_message = error_message
+    analysis_job.completed_at = timezone.now()
+    analysis_job.save()
+    events.publish(analysis_job.id, 'done', job_summary(analysis_job))
+
+
+def charge_usage(analysis_job, usage):
+    """Add the token counts and estimated cost of OpenAI calls to a job's totals."""
+    if not usage:
+        return
+    analysis_job.prompt_tokens += usage.get('prompt_tokens', 0)
+    analysis_job.completion_tokens += usage.get('completion_tokens', 0)
+    analysis_job.cached_tokens += usage.get('cached_tokens', 0)
+    analysis_job.estimated_cost += usage.get('cost', 0)
+
+
+def fail_item(item, error):
+    """Mark an AnalysisItem as failed with its error message."""
+    item.state = 'failed'
+    item.last_error = str(error)
+
+
+class AnalysisWriter:
+    """
+    Buffers the database writes of an analysis run and checkpoints its items.
+
+    Candidates are saved through save_candidates in chunks, and the job's
+    progress counters are written at most every PROGRESS_FLUSH_SECONDS or
+    PROGRESS_FLUSH_ROWS processed resumes, so SQLite sees a few larger write
+    transactions instead of several per resume. Candidates, AnalysisItem
+    states and job counters are flushed in one transaction, so an
+    interrupted job resumes from a consistent checkpoint. Counters are
+    updated in memory on analysis_job by the caller.
+
+    Usage:
+        with AnalysisWriter(analysis_job, jd_hashes) as writer:
+            writer.add(candidate, resume, jd, item)
+            analysis_job.processed_resumes += 1
+            writer.step()
+    """
+
+    def __init__(self, analysis_job, jd_hashes, chunk_size=None, flush_seconds=None, flush_rows=None):
+        self.analysis_job = analysis_job
+        self.jd_hashes = jd_hashes  # JobDescription id -> hash of the JD text used
+        self.chunk_size = chunk_size or ANALYSIS_WRITE_CHUNK
+        self.flush_seconds = PROGRESS_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.flush_rows = flush_rows or PROGRESS_FLUSH_ROWS
+        self._pending = {}  # JobDescription id -> (JobDescription, [(candidate, resume)])
+        self._pending_count = 0
+        self._items = {}
+        self._steps = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, candidate, resume, jd, item=None):
+        """Queue an unsaved Candidate for resume vs jd, marking its AnalysisItem as scored."""
+        self._pending.setdefault(jd.id, (jd, []))[1].append((candidate, resume))
+        self._pending_count += 1
+        if item is not None:
+            item.state = 'scored'
+            item.last_error = ''
+            self.update_item(item)
+        if self._pending_count >= self.chunk_size:
+            self.flush()
+
+    def update_item(self, item):
+        """Queue an AnalysisItem whose state changed."""
+        self._items[item.id] = item
+
+    def step(self, count=1):
+        """Record processed resumes and flush progress if it is due."""
+        self._steps += count
+        if self._steps >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Write pending candidates, item states and the job's progress counters."""
+        pending, self._pending = list(self._pending.values()), {}
+        self._pending_count = 0
+        items, self._items = list(self._items.values()), {}
+        now = timezone.now()
+        for item in items:
+            item.updated_at = now
+
+        started = time.perf_counter()
+        saved = []
+        with transaction.atomic():
+            for jd, pairs in pending:
+                saved.extend(save_candidates(pairs, jd, self.jd_hashes[jd.id]))
+            AnalysisItem.objects.bulk_update(items, ITEM_FIELDS)
+            AnalysisJob.objects.filter(id=self.analysis_job.id).update(
+                **{field: getattr(self.analysis_job, field) for field in PROGRESS_FIELDS}
+            )
+        observe('hr_analysis_stage_seconds', time.perf_counter() - started, stage='write')
+        for state in ('scored', 'failed'):
+            inc('hr_analysis_items_total', sum(1 for item in items if item.state == state), state=state)
+        self._steps = 0
+        self._last_flush = time.monotonic()
+        self._publish(saved, items)
+
+    def _publish(self, candidates, items):
+        """Stream what was just committed: per-resume results, failures and progress."""
+        job_id = self.analysis_job.id
+        for candidate in candidates:
+            events.publish(job_id, 'result', {
+                'candidate_id': candidate.id,
+                'candidate_name': candidate.candidate_name,
+                'resume_file': candidate.resume_file,
+                'job_description': candidate.job_description_id,
+                'score': candidate.score,
+                'status': candidate.status,
+                'verdict': candidate.verdict
+            })
+        for item in items:
+            if item.state == 'failed':
+                events.publish(job_id, 'failed', {
+                    'item_id': item.id,
+                    'resume_file': item.resume.file_name,
+                    'job_description': item.job_description_id,
+                    'error': item.last_error
+                })
+        events.publish(job_id, 'progress', job_summary(self.analysis_job))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        # Keep what was scored even if the run fails part-way
+        self.flush()
+
+
+def build_candidate(result, resume_file, prescore=None):
+    """Build an unsaved Candidate from a score_resume result."""
+    usage = result.get('usage') or {}
+    return Candidate(
+        candidate_name=result.get('candidate_name', 'Unknown'),
+        email=result.get('email', 'Not Provided'),
+        phone=result.get('phone', 'Not Provided'),
+        years_of_experience=result.get('years_of_experience', 'Not Provided'),
+        score=result.get('score', 0),
+        fitness_reasoning=result.get('fitness_reasoning', ''),
+        matching_skills=result.get('matching_skills', ''),
+        missing_skills=result.get('missing_skills', ''),
+        verdict=result.get('verdict', 'Pending'),
+        status='shortlisted' if result.get('score', 0) >= 80 else 'rejected',
+        resume_file=resume_file,
+        prescore=prescore,
+        prompt_tokens=usage.get('prompt_tokens', 0),
+        completion_tokens=usage.get('completion_tokens', 0),
+        estimated_cost=usage.get('cost', 0)
+    )
+
+
+def build_filtered_candidate(resume_file, prescore):
+    """Build an unsaved, rejected Candidate for a resume skipped by the pre-filter."""
+    return Candidate(
+        candidate_name=os.path.splitext(resume_file)[0].replace('_', ' '),
+        email='Not Provided',
+        phone='Not Provided',
+        years_of_experience='Not Provided',
+        score=0,
+        fitness_reasoning=f'Skipped by pre-filter (relevance {prescore:.1f}/100)',
+        verdict='Filtered',
+        status='rejected',
+        resume_file=resume_file,
+        prescore=prescore
+    )
+
+
+def clear_resume_folders(folders):
+    """Delete analysed PDFs from the resume folders."""
+    try:
+        for folder in folders:
+            if folder.exists():
+                for file in folder.glob("*.pdf"):
+                    file.unlink()
+                print(f"✅ Cleared {folder}")
+    except Exception as e:
+        print(f"⚠️ Warning: Could not clear resume folders: {str(e)}")
+
+
+def submit_batch_job(analysis_job, jd_texts, to_score):
+    """
+    Send all scoring prompts of a job to the OpenAI Batch API.
+
+    Args:
+        analysis_job: AnalysisJob in 'batch' mode
+        jd_texts: JobDescription id -> JD text
+        to_score: List of (AnalysisItem, resume_text) that passed the pre-filter
+    """
+    if not to_score:
+        # Nothing passed the pre-filter; there is no batch to submit
+        finish_job(analysis_job, 'completed')
+        return
+
+    items = {}
+    requests = []
+    for item, resume_text in to_score:
+        custom_id = f"job{analysis_job.id}-item{item.id}"
+        items[custom_id] = {
+            'item_id': item.id,
+            'resume_file': item.resume.file_name,
+            'prescore': item.prescore
+        }
+        requests.append((custom_id, jd_texts[item.job_description_id], resume_text))
+
+    analysis_job.batch_items = items
+    analysis_job.batch_id = submit_batch(
+        client, requests, metadata={'analysis_job': str(analysis_job.id)}
+    )
+    analysis_job.batch_status = 'validating'
+    analysis_job.save()
+    events.publish(analysis_job.id, 'status', {
+        **job_summary(analysis_job), 'batch_id': analysis_job.batch_id, 'batch_status': analysis_job.batch_status
+    })
+
+
+def poll_batch_job(analysis_job, folders=()):
+    """
+    Check a batch-mode job and ingest its results once the batch finishes.
+
+    The API action and the worker both poll, so a finished batch is claimed
+    with a conditional update before its output is ingested; a poll that
+    loses the claim leaves the job to the one that won it.
+
+    Args:
+        analysis_job: AnalysisJob with a batch_id
+        folders: Resume folders to clear after a successful ingest
+
+    Returns:
+        True if the job reached a final state
+    """
+    if analysis_job.status in ('completed', 'failed'):
+        return True
+
+    batch = get_batch(client, analysis_job.batch_id)
+    if batch.status != analysis_job.batch_status:
+        events.publish(analysis_job.id, 'status', {
+            **job_summary(analysis_job), 'batch_id': batch.id, 'batch_status': batch.status
+        })
+    stale_before = timezone.now() - timedelta(seconds=BATCH_INGEST_STALE_SECONDS)
+    unclaimed = AnalysisJob.objects.filter(id=analysis_job.id, status='processing').filter(
+        ~Q(batch_status=BATCH_INGESTING) | Q(heartbeat_at__lt=stale_before)
+    )
+
+    if batch.status not in BATCH_DONE_STATES:
+        unclaimed.update(batch_status=batch.status)
+        analysis_job.batch_status = batch.status
+        return False
+
+    if not unclaimed.update(batch_status=BATCH_INGESTING, heartbeat_at=timezone.now()):
+        analysis_job.refresh_from_db()
+        return analysis_job.status in ('completed', 'failed')
+    analysis_job.refresh_from_db()
+    analysis_job.batch_status = batch.status
+
+    try:
+        if batch.status != 'completed':
+            finish_job(analysis_job, 'failed', f'OpenAI batch {batch.id} ended with status {batch.status}')
+            return True
+        ingest_batch_results(analysis_job, batch, folders)
+    except Exception:
+        # Release the claim so a later poll can ingest the batch
+        AnalysisJob.objects.filter(id=analysis_job.id, batch_status=BATCH_INGESTING).update(batch_status=batch.status)
+        raise
+    return True
+
+
+def ingest_batch_results(analysis_job, batch, folders=()):
+    """Write the results of a completed OpenAI batch and complete its (claimed) job."""
+    results = fetch_batch_results(client, batch)
+    jd_hashes = {int(jd_id): jd_hash for jd_id, jd_hash in (analysis_job.options or {}).get('jd_hashes', {}).items()}
+    analysis_items = AnalysisItem.objects.select_related('resume', 'job_description').in_bulk(
+        [entry['item_id'] for entry in analysis_job.batch_items.values()]
+    )
+    with AnalysisWriter(analysis_job, jd_hashes) as writer:
+        for custom_id, entry in analysis_job.batch_items.items():
+            item = analysis_items.get(entry['item_id'])
+            if item is None or item.state == 'scored':
+                continue
+
+            result = results.get(custom_id)
+            if result:
+                charge_usage(analysis_job, result.get('usage'))
+                candidate = build_candidate(result, entry['resume_file'], entry.get('prescore'))
+                writer.add(candidate, item.resume, item.job_description, item)
+                if candidate.score >= 80:
+                    analysis_job.shortlisted_count += 1
+            else:
+                print(f"Error processing {entry['resume_file']}: no batch result")
+                fail_item(item, 'No result in OpenAI batch output')
+                writer.update_item(item)
+
+            analysis_job.processed_resumes += 1
+            writer.step()
+
+    finish_job(analysis_job, 'completed')
+
+    if CLEAR_RESUMES_AFTER_ANALYSIS:
+        clear_resume_folders(folders)
+
+
+def get_job_descriptions(analysis_job):
+    """Return the JDs an analysis job scores against: its fan-out set, else its single JD."""
+    jds = list(analysis_job.job_descriptions.all())
+    if jds:
+        return jds
+
+    active_jd = analysis_job.job_description or JobDescription.objects.filter(is_active=True).first()
+    if not active_jd:
+        raise Exception("No active job description found. Please create one first.")
+    return [active_jd]
+
+
+def find_resume_files():
+    """Collect resume PDFs from both folders."""
+    resume_files = []
+    for folder in resume_folders():
+        if folder.exists():
+            resume_files.extend(folder.glob("*.pdf"))
+
+    if not resume_files:
+        raise Exception("No resume files found in data/resumes or data/local_upload")
+    return resume_files
+
+
+def estimate_analysis(jds, mode='interactive', options=None):
+    """
+    Dry run of an analysis: predict its LLM calls, tokens, cost and duration.
+
+    Selects the same new or changed (resume, JD) pairs as a real run, and
+    applies the pre-filter to resumes whose full text is known locally
+    (resumes still needing OCR are assumed to pass). No OpenAI call is made.
+
+    Args:
+        jds: JobDescriptions the run would score against
+        mode: 'interactive' or 'batch'
+        options: Pre-filter overrides ('prefilter_min_score', 'prefilter_top_n')
+
+    Returns:
+        estimate_run() result plus pair counts
+    """
+    options = options or {}
+    jd_texts = {}
+    for jd in jds:
+        jd_texts[jd.id] = get_jd_text(jd)
+        if not jd_texts[jd.id]:
+            raise Exception(f"Could not extract job description text for '{jd.title}'")
+
+    resumes = sync_resume_files(find_resume_files())
+    pending = {
+        jd.id: select_changed_resumes(resumes, jd, text_sha256(jd_texts[jd.id]))
+        for jd in jds
+    }
+
+    documents = {}
+    for resume in {resume.id: resume for changed in pending.values() for resume in changed}.values():
+        try:
+            documents[resume.id] = inspect_document(resume.path)
+        except Exception as e:
+            print(f"Error inspecting {resume.file_name}: {e}")
+
+    pairs = []
+    prefiltered = 0
+    for jd in jds:
+        ids = [resume.id for resume in pending[jd.id] if resume.id in documents]
+        known = [resume_id for resume_id in ids if not documents[resume_id]['ocr_pages']]
+        keep = select_for_scoring(
+            prescore_resumes(jd_texts[jd.id], [documents[resume_id]['text'] for resume_id in known]),
+            min_score=options.get('prefilter_min_score'),
+            top_n=options.get('prefilter_top_n')
+        )
+        kept = {resume_id for resume_id, passed in zip(known, keep) if passed}
+        prefiltered += len(known) - len(kept)
+        pairs.extend((resume_id, jd.id) for resume_id in ids if resume_id in kept or documents[resume_id]['ocr_pages'])
+
+    estimate = estimate_run(documents, pairs, jd_texts, batch=mode == 'batch')
+    estimate['pairs'] = {
+        'total': len(resumes) * len(jds),
+        'unchanged': len(resumes) * len(jds) - sum(len(changed) for changed in pending.values()),
+        'prefiltered': prefiltered,
+        'unreadable': sum(1 for changed in pending.values() for resume in changed if resume.id not in documents),
+        'to_score': len(pairs),
+    }
+    return estimate
+
+
+def create_analysis_items(analysis_job, jds, jd_hashes):
+    """
+    Create the job's AnalysisItems for every new or changed (resume, JD) pair.
+
+    Returns:
+        List of AnalysisItems with their resumes and JDs
+    """
+    # Only resumes that are new, modified, or not yet analysed against each JD
+    resumes = sync_resume_files(find_resume_files())
+    items = []
+    for jd in jds:
+        pending = select_changed_resumes(resumes, jd, jd_hashes[jd.id])
+        items.extend(AnalysisItem(analysis_job=analysis_job, resume=resume, job_description=jd) for resume in pending)
+    AnalysisItem.objects.bulk_create(items)
+
+    analysis_job.total_resumes = len(items)
+    analysis_job.unchanged_count = len(resumes) * len(jds) - len(items)
+    analysis_job.save()
+    return list(analysis_job.items.select_related('resume', 'job_description'))
+
+
+def run_analysis_job(analysis_job):
+    """
+    Run a claimed AnalysisJob: extract, pre-filter and score new or changed resumes.
+
+    A job scores against one JD, or fans out to several: each resume is
+    extracted once and its text is scored against every selected JD, with
+    one Candidate per (resume, JD). Pairs already analysed in their current
+    version against the current JD text are skipped; re-analysed pairs
+    update their existing Candidate.
+    Each pair is tracked as an AnalysisItem, so a job that was interrupted
+    or requeued only processes its pending and extracted items; failed items
+    are left alone until they are reset for retry.
+    Batch-mode jobs stop after submitting to the Batch API and are finished
+    by poll_batch_job.
+
+    Args:
+        analysis_job: AnalysisJob in 'processing' state
+    """
+    options = analysis_job.options or {}
+
+    jds = get_job_descriptions(analysis_job)
+    jd_texts = {}
+    for jd in jds:
+        jd_texts[jd.id] = get_jd_text(jd)
+        if not jd_texts[jd.id]:
+            raise Exception(f"Could not extract job description text for '{jd.title}'")
+    jd_hashes = {jd_id: text_sha256(text) for jd_id, text in jd_texts.items()}
+
+    # Link analysis job to JD
+    if len(jds) == 1:
+        analysis_job.job_description = jds[0]
+    analysis_job.options = {**options, 'jd_hashes': {str(jd_id): jd_hash for jd_id, jd_hash in jd_hashes.items()}}
+    analysis_job.save()
+    events.publish(analysis_job.id, 'status', job_summary(analysis_job))
+
+    # Items checkpointed before JDs were tracked per item belong to the job's single JD
+    analysis_job.items.filter(job_description__isnull=True).update(job_description=jds[0])
+
+    items = list(analysis_job.items.select_related('resume', 'job_description'))
+    if items:
+        remaining = [item for item in items if item.state in ('pending', 'extracted')]
+        print(f"↩️  Resuming analysis job {analysis_job.id}: {len(remaining)} of {len(items)} item(s) left")
+    else:
+        items = create_analysis_items(analysis_job, jds, jd_hashes)
+        remaining = items
+
+    with AnalysisWriter(analysis_job, jd_hashes) as writer:
+        # Extract each resume once in a process pool, then fan its text out to every JD
+        items_by_path = {}
+        for item in remaining:
+            items_by_path.setdefault(item.resume.path, []).append(item)
+
+        started = time.perf_counter()
+        extracted = []
+        for path, document, error in iter_extract_documents(list(items_by_path)):
+            if document:
+                charge_usage(analysis_job, document.get('usage'))
+            for item in items_by_path[path]:
+                item.attempts += 1
+                if error:
+                    print(f"Error processing {item.resume.file_name}: {error}")
+                    fail_item(item, error)
+                    analysis_job.processed_resumes += 1
+                else:
+                    if item.state == 'pending':
+                        item.state = 'extracted'
+                    extracted.append((item, document['text']))
+                writer.update_item(item)
+                writer.step()
+        observe('hr_analysis_stage_seconds', time.perf_counter() - started, stage='extract')
+
+        # Cheap local pre-ranking per JD of items not pre-filtered yet; only those that pass go to the LLM
+        started = time.perf_counter()
+        for jd in jds:
+            fresh = [(item, text) for item, text in extracted if item.prescore is None and item.job_description_id == jd.id]
+            prescores = prescore_resumes(jd_texts[jd.id], [text for _, text in fresh])
+            keep = select_for_scoring(
+                prescores,
+                min_score=options.get('prefilter_min_score'),
+                top_n=options.get('prefilter_top_n')
+            )
+            for (item, _), score, passed in zip(fresh, prescores, keep):
+                item.prescore = float(score)
+                if passed:
+                    writer.update_item(item)
+                    continue
+                writer.add(build_filtered_candidate(item.resume.file_name, item.prescore), item.resume, jd, item)
+                analysis_job.prefiltered_count += 1
+                analysis_job.processed_resumes += 1
+                writer.step()
+        observe('hr_analysis_stage_seconds', time.perf_counter() - started, stage='prefilter')
+
+    to_score = [(item, text) for item, text in extracted if item.state != 'scored']
+
+    if analysis_job.mode == 'batch':
+        # Hand the prompts to the OpenAI Batch API; results are ingested by poll_batch_job
+        started = time.perf_counter()
+        submit_batch_job(analysis_job, jd_texts, to_score)
+        observe('hr_analysis_stage_seconds', time.perf_counter() - started, stage='batch_submit')
+        return
+
+    # Score the remaining (resume, JD) pairs concurrently
+    started = time.perf_counter()
+    with ScoringEngine(pack_size=options.get('pack_size')) as engine, AnalysisWriter(analysis_job, jd_hashes) as writer:
+        pairs = ((item, jd_texts[item.job_description_id], text) for item, text in to_score)
+        for item, result in engine.score_pairs_stream(pairs):
+            if result:
+                charge_usage(analysis_job, result.get('usage'))
+                candidate = build_candidate(result, item.resume.file_name, item.prescore)
+                writer.add(candidate, item.resume, item.job_description, item)
+
+                if candidate.score >= 80:
+                    analysis_job.shortlisted_count += 1
+            else:
+                fail_item(item, 'AI scoring returned no result')
+                writer.update_item(item)
+
+            analysis_job.processed_resumes += 1
+            writer.step()
+    observe('hr_analysis_stage_seconds', time.perf_counter() - started, stage='score')
+
+    # Mark job as completed
+    finish_job(analysis_job, 'completed')
+
+    if CLEAR_RESUMES_AFTER_ANALYSIS:
+        clear_resume_folders(resume_folders())
+
+
+def retry_analysis_job(analysis_job, item_ids=None):
+    """
+    Requeue a stopped job so the worker resumes it.
+
+    Unfinished items are picked up again; failed items (or only those in
+    item_ids) are reset to pending for another attempt.
+
+    Returns:
+        Number of failed items reset
+    """
+    failed = analysis_job.items.filter(state='failed')
+    if item_ids:
+        failed = failed.filter(id__in=item_ids)
+    reset = failed.update(state='pending', prescore=None, last_error='')
+
+    analysis_job.processed_resumes = max(0, analysis_job.processed_resumes - reset)
+    analysis_job.status = 'queued'
+    analysis_job.error_message = ''
+    analysis_job.completed_at = None
+    if analysis_job.mode == 'batch':
+        # A new batch is submitted for whatever is left
+        analysis_job.batch_id = ''
+        analysis_job.batch_status = ''
+        analysis_job.batch_items = {}
+    analysis_job.save()
+    # Streams of the requeued job start afresh
+    events.reset(analysis_job.id)
+    return reset
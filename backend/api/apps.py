@@ -4,3 +4,23 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        if settings.SQLITE_WAL:
+            connection_created.connect(enable_sqlite_wal)
+
+
+def enable_sqlite_wal(sender, connection, **kwargs):
+    """
+    Let dashboard reads proceed while the analysis worker is writing.
+
+    WAL mode is stored in the database file, so it is only switched on when
+    the file is not in WAL mode yet instead of on every connection.
+    """
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            if cursor.fetchone()[0].lower() != 'wal':
+                cursor.execute('PRAGMA journal_mode=WAL')
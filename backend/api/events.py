@@ -0,0 +1,106 @@
+"""
+Per-job event log used to stream analysis progress over Server-Sent Events.
+
+The worker appends JSON lines to a small file per AnalysisJob and the SSE
+view tails it, so a connected UI gets progress, per-resume results and the
+final summary without polling the database.
+"""
+import json
+import os
+import time
+from src.utils.disk_cache import CACHE_DIR
+
+EVENTS_DIR = os.path.join(CACHE_DIR, "job_events")
+
+# Seconds between file checks and between keep-alive comments on an idle stream
+EVENT_POLL_SECONDS = float(os.getenv("SSE_POLL_SECONDS", "0.5"))
+KEEPALIVE_SECONDS = 15
+
+# Events after which the stream is closed
+FINAL_EVENTS = ("done",)
+
+
+def _path(job_id):
+    return os.path.join(EVENTS_DIR, f"job_{job_id}.jsonl")
+
+
+def publish(job_id, event, data):
+    """Append an event to a job's log (never raises: progress events are best effort)."""
+    try:
+        os.makedirs(EVENTS_DIR, exist_ok=True)
+        line = json.dumps({"event": event, "data": data}, default=str) + "\n"
+        # One write per line in append mode, so concurrent writers never interleave lines
+        with open(_path(job_id), "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError as e:
+        print(f"⚠️ Could not publish {event} event for job {job_id}: {e}")
+
+
+def reset(job_id):
+    """Drop a job's event log (e.g. when the job is requeued)."""
+    try:
+        os.remove(_path(job_id))
+    except FileNotFoundError:
+        pass
+
+
+def read_events(job_id, offset=0):
+    """
+    Read a job's events written after byte offset.
+
+    An offset past the end of the log (which was reset since, e.g. by a
+    retry) starts over from the beginning of the new log.
+
+    Returns:
+        List of (next_offset, event, data); next_offset doubles as the SSE event id
+    """
+    try:
+        with open(_path(job_id), "rb") as f:
+            if offset > os.fstat(f.fileno()).st_size:
+                offset = 0
+            f.seek(offset)
+            chunk = f.read()
+    except FileNotFoundError:
+        return []
+
+    events = []
+    for line in chunk.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break  # Partially written line; picked up on the next read
+        offset += len(line)
+        record = json.loads(line)
+        events.append((offset, record["event"], record["data"]))
+    return events
+
+
+def format_sse(event, data, event_id=None):
+    """Encode one Server-Sent Event."""
+    message = ""
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def stream_events(job_id, offset=0, timeout=None):
+    """
+    Generator of SSE messages for a job, from byte offset until the job's
+    final event (or timeout seconds, after which the client reconnects with
+    Last-Event-ID).
+    """
+    last_sent = time.monotonic()
+    deadline = time.monotonic() + timeout if timeout else None
+
+    while deadline is None or time.monotonic() < deadline:
+        events = read_events(job_id, offset)
+        for offset, event, data in events:
+            yield format_sse(event, data, event_id=offset)
+            if event in FINAL_EVENTS:
+                return
+
+        if events:
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+
+        time.sleep(EVENT_POLL_SECONDS)
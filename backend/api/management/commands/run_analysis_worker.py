@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from api.worker import run_worker
+
+
+class Command(BaseCommand):
+    help = "Process queued resume analysis jobs and poll OpenAI batch jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--worker-id', default=None, help='Identifier recorded on claimed jobs')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between queue checks')
+        parser.add_argument('--once', action='store_true', help='Process at most one job and exit')
+
+    def handle(self, *args, **options):
+        run_worker(
+            worker_id=options['worker_id'],
+            poll_interval=options['poll_interval'],
+            once=options['once']
+        )
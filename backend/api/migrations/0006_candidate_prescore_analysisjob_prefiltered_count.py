@@ -0,0 +1,23 @@
+# Generated by Django 4.2.26 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_add_probation_months'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='prefiltered_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='prescore',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
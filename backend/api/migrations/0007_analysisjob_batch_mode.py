@@ -0,0 +1,33 @@
+# Generated by Django 4.2.26 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_candidate_prescore_analysisjob_prefiltered_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='batch_id',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='batch_items',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='batch_status',
+            field=models.CharField(blank=True, max_length=30),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='mode',
+            field=models.CharField(choices=[('interactive', 'Interactive'), ('batch', 'OpenAI Batch')], default='interactive', max_length=20),
+        ),
+    ]
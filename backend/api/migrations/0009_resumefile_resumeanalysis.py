@@ -0,0 +1,47 @@
+# Generated by Django 4.2.26 on 2026-10-17 12:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_analysisjob_worker'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500, unique=True)),
+                ('file_name', models.CharField(max_length=255)),
+                ('content_hash', models.CharField(db_index=True, max_length=64)),
+                ('size', models.BigIntegerField(default=0)),
+                ('modified_at', models.FloatField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='unchanged_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ResumeAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('jd_hash', models.CharField(max_length=64)),
+                ('analyzed_at', models.DateTimeField(auto_now=True)),
+                ('candidate', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.candidate')),
+                ('job_description', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resume_analyses', to='api.jobdescription')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analyses', to='api.resumefile')),
+            ],
+            options={
+                'unique_together': {('resume', 'job_description')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.26 on 2026-10-17 13:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_resumefile_resumeanalysis'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('pending', 'Pending'), ('extracted', 'Extracted'), ('scored', 'Scored'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('prescore', models.FloatField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('analysis_job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='api.analysisjob')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analysis_items', to='api.resumefile')),
+            ],
+            options={
+                'ordering': ['id'],
+                'unique_together': {('analysis_job', 'resume')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.26 on 2026-10-17 14:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_analysisitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisitem',
+            name='job_description',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='api.jobdescription'),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='job_descriptions',
+            field=models.ManyToManyField(blank=True, related_name='fanout_jobs', to='api.jobdescription'),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='job_description',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='candidates', to='api.jobdescription'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='analysisitem',
+            unique_together={('analysis_job', 'resume', 'job_description')},
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.26 on 2026-10-17 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_multi_jd_fanout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='completion_tokens',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='estimated_cost',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='analysisjob',
+            name='prompt_tokens',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='completion_tokens',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='estimated_cost',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='prompt_tokens',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.26 on 2026-10-17 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_token_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysisjob',
+            name='cached_tokens',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='jobdescription',
+            name='extracted_text',
+            field=models.TextField(blank=True),
+        ),
+    ]
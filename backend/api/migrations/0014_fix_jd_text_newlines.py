@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def fix_jd_text_newlines(apps, schema_editor):
+    """Replace the literal "\\n" sequences stored by build_jd_text for JDs without a PDF."""
+    JobDescription = apps.get_model('api', 'JobDescription')
+    for jd in JobDescription.objects.exclude(extracted_text=''):
+        broken = f"{jd.title}\\n\\n{jd.description}\\n\\nRequirements:\\n{jd.requirements}"
+        if jd.extracted_text == broken:
+            jd.extracted_text = f"{jd.title}\n\n{jd.description}\n\nRequirements:\n{jd.requirements}"
+            jd.save(update_fields=['extracted_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_jd_text_prompt_cache'),
+    ]
+
+    operations = [
+        migrations.RunPython(fix_jd_text_newlines, migrations.RunPython.noop),
+    ]
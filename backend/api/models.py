@@ -23,6 +23,13 @@ class Candidate(models.Model):
     verdict = models.CharField(max_length=50, default='Pending')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     resume_file = models.CharField(max_length=255, blank=True)
+    prescore = models.FloatField(null=True, blank=True)  # Local keyword relevance before LLM scoring
+    job_description = models.ForeignKey('JobDescription', on_delete=models.SET_NULL, null=True, blank=True, related_name='candidates')
+    
+    # OpenAI usage of the scoring call behind this result (0 when it came from the score cache)
+    prompt_tokens = models.IntegerField(default=0)
+    completion_tokens = models.IntegerField(default=0)
+    estimated_cost = models.FloatField(default=0)  # USD
     
     # Appointment letter fields
     position_title = models.CharField(max_length=255, blank=True, null=True)
@@ -50,6 +57,7 @@ class JobDescription(models.Model):
     description = models.TextField()
     requirements = models.TextField(blank=True)
     file_path = models.CharField(max_length=500, default='data/templates/hiring_post.pdf')
+    extracted_text = models.TextField(blank=True)  # JD text used for scoring, extracted once at upload/activation
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -61,6 +69,38 @@ class JobDescription(models.Model):
         return self.title
 
 
+class ResumeFile(models.Model):
+    """Model to track resume PDFs by path and content hash"""
+    
+    path = models.CharField(max_length=500, unique=True)
+    file_name = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64, db_index=True)  # SHA-256 of the file bytes
+    size = models.BigIntegerField(default=0)
+    modified_at = models.FloatField(default=0)  # File mtime, used to skip re-hashing unchanged files
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return self.file_name
+
+
+class ResumeAnalysis(models.Model):
+    """Marks which version of a resume has been analysed against a job description"""
+    
+    resume = models.ForeignKey(ResumeFile, on_delete=models.CASCADE, related_name='analyses')
+    job_description = models.ForeignKey(JobDescription, on_delete=models.CASCADE, related_name='resume_analyses')
+    candidate = models.ForeignKey(Candidate, on_delete=models.SET_NULL, null=True, blank=True)
+    content_hash = models.CharField(max_length=64)  # Resume hash that was analysed
+    jd_hash = models.CharField(max_length=64)  # JD text hash that was analysed against
+    analyzed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('resume', 'job_description')
+    
+    def __str__(self):
+        return f"{self.resume} vs {self.job_description}"
+
+
 class AnalysisJob(models.Model):
     """Model to track analysis jobs"""
     
@@ -71,12 +111,39 @@ class AnalysisJob(models.Model):
         ('failed', 'Failed'),
     ]
     
+    MODE_CHOICES = [
+        ('interactive', 'Interactive'),
+        ('batch', 'OpenAI Batch'),
+    ]
+    
     job_description = models.ForeignKey(JobDescription, on_delete=models.SET_NULL, null=True, blank=True)
+    job_descriptions = models.ManyToManyField(JobDescription, blank=True, related_name='fanout_jobs')  # Multi-JD fan-out
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES, default='interactive')
     total_resumes = models.IntegerField(default=0)
     processed_resumes = models.IntegerField(default=0)
     shortlisted_count = models.IntegerField(default=0)
+    prefiltered_count = models.IntegerField(default=0)  # Resumes skipped by the local pre-filter
+    unchanged_count = models.IntegerField(default=0)  # Resumes already analysed against this JD
+    
+    # OpenAI usage of the run: Vision OCR during extraction plus scoring
+    prompt_tokens = models.IntegerField(default=0)
+    completion_tokens = models.IntegerField(default=0)
+    cached_tokens = models.IntegerField(default=0)  # Prompt tokens served from OpenAI's prompt cache
+    estimated_cost = models.FloatField(default=0)  # USD
+    
     error_message = models.TextField(blank=True)
+    
+    # Batch mode: remote batch id/status and custom_id -> resume metadata for ingestion
+    batch_id = models.CharField(max_length=100, blank=True)
+    batch_status = models.CharField(max_length=30, blank=True)
+    batch_items = models.JSONField(default=dict, blank=True)
+    
+    # Background worker: request options, claiming worker and liveness
+    options = models.JSONField(default=dict, blank=True)
+    worker_id = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -86,3 +153,30 @@ class AnalysisJob(models.Model):
     
     def __str__(self):
         return f"Job {self.id} - {self.status}"
+
+
+class AnalysisItem(models.Model):
+    """Model to checkpoint each resume of an analysis job"""
+    
+    STATE_CHOICES = [
+        ('pending', 'Pending'),
+        ('extracted', 'Extracted'),
+        ('scored', 'Scored'),
+        ('failed', 'Failed'),
+    ]
+    
+    analysis_job = models.ForeignKey(AnalysisJob, on_delete=models.CASCADE, related_name='items')
+    resume = models.ForeignKey(ResumeFile, on_delete=models.CASCADE, related_name='analysis_items')
+    job_description = models.ForeignKey(JobDescription, on_delete=models.CASCADE, null=True, blank=True)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='pending')
+    prescore = models.FloatField(null=True, blank=True)  # Set once the item has been through the pre-filter
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['id']
+        unique_together = ('analysis_job', 'resume', 'job_description')
+    
+    def __str__(self):
+        return f"Job {self.analysis_job_id} - {self.resume} vs JD {self.job_description_id} ({self.state})"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Candidate, JobDescription, AnalysisJob
+from .models import Candidate, JobDescription, AnalysisJob, AnalysisItem
 
 
 class CandidateSerializer(serializers.ModelSerializer):
@@ -12,9 +12,33 @@ class JobDescriptionSerializer(serializers.ModelSerializer):
     class Meta:
         model = JobDescription
         fields = '__all__'
+        read_only_fields = ['extracted_text']
 
 
 class AnalysisJobSerializer(serializers.ModelSerializer):
     class Meta:
         model = AnalysisJob
         fields = '__all__'
+
+
+class AnalysisItemSerializer(serializers.ModelSerializer):
+    resume_file = serializers.CharField(source='resume.file_name', read_only=True)
+    
+    class Meta:
+        model = AnalysisItem
+        fields = ['id', 'resume_file', 'job_description', 'state', 'prescore', 'attempts', 'last_error', 'updated_at']
+
+
+class AnalyzeResumesSerializer(serializers.Serializer):
+    """Request body of POST /api/analyze/"""
+    mode = serializers.ChoiceField(choices=AnalysisJob.MODE_CHOICES, default='interactive')
+    job_description_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+    prefilter_min_score = serializers.FloatField(min_value=0, max_value=100, required=False, allow_null=True, default=None)
+    prefilter_top_n = serializers.IntegerField(min_value=0, required=False, allow_null=True, default=None)
+    pack_size = serializers.IntegerField(min_value=0, required=False, allow_null=True, default=None)
+    dry_run = serializers.BooleanField(required=False, default=False)
+
+
+class RetryAnalysisJobSerializer(serializers.Serializer):
+    """Request body of POST /api/analysis-jobs/{id}/retry/"""
+    item_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
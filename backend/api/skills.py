@@ -0,0 +1,45 @@
+"""
+Candidate skill matrix for re-ranking without LLM calls.
+
+The matrix is rebuilt from Candidate.matching_skills whenever candidates
+change, persisted under HR_CACHE_DIR so other processes and restarts can
+reuse it, and kept in memory between requests.
+"""
+import threading
+from django.db.models import Count, Max
+from .models import Candidate
+from src.core.skill_matrix import SkillMatrix, SKILL_MATRIX_PATH
+
+_matrix = None
+_lock = threading.Lock()
+
+
+def candidates_fingerprint():
+    """Changes whenever a candidate is added, removed or updated."""
+    stats = Candidate.objects.aggregate(count=Count('id'), last_id=Max('id'), updated=Max('updated_at'))
+    return f"{stats['count']}:{stats['last_id']}:{stats['updated'].isoformat() if stats['updated'] else ''}"
+
+
+def get_skill_matrix():
+    """Return an up-to-date SkillMatrix, loading or rebuilding it only when candidates changed."""
+    global _matrix
+    fingerprint = candidates_fingerprint()
+    with _lock:
+        if _matrix is not None and _matrix.fingerprint == fingerprint:
+            return _matrix
+
+        try:
+            matrix = SkillMatrix.load(SKILL_MATRIX_PATH)
+        except (OSError, ValueError, KeyError):
+            matrix = None
+
+        if matrix is None or matrix.fingerprint != fingerprint:
+            rows = Candidate.objects.order_by('id').values_list('id', 'matching_skills').iterator(chunk_size=2000)
+            matrix = SkillMatrix.build(rows, fingerprint)
+            try:
+                matrix.save(SKILL_MATRIX_PATH)
+            except OSError as e:
+                print(f"⚠️  Could not save skill matrix: {e}")
+
+        _matrix = matrix
+        return _matrix
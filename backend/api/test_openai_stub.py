@@ -0,0 +1,321 @@
+"""
+Scoring engine and Batch API mode tested against a local stand-in for the
+OpenAI API: the real OpenAI clients are pointed at it with OPENAI_BASE_URL.
+"""
+import asyncio
+import email
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from openai import OpenAI
+from api import analysis, events
+from api.models import AnalysisItem, AnalysisJob, Candidate, JobDescription, ResumeFile
+from src.core import score_cache
+from src.core.score_cache import text_sha256
+from src.core.scoring_engine import RateLimiter, ScoringEngine
+from src.utils.disk_cache import DiskCache
+
+JD_TEXT = 'Backend engineer. Python, Django and PostgreSQL.'
+
+
+def make_resume(name, skills='Python, Django', delay=0):
+    """Resume text the stub scores: 85 when it mentions Python, else 40; Delay: sleeps first."""
+    return f'Name: {name}\nDelay: {delay}\nSkills: {skills}\nExperience: 5 years building web services.'
+
+
+def stub_score(resume_text):
+    name = re.search(r'Name: (.+)', resume_text).group(1).strip()
+    score = 85 if 'python' in resume_text.lower() else 40
+    return {
+        'candidate_name': name, 'email': f'{name.lower()}@example.com', 'phone': 'Not Provided',
+        'years_of_experience': '5 years', 'score': score, 'fitness_reasoning': 'Stub',
+        'matching_skills': 'Python', 'missing_skills': '', 'verdict': 'Shortlist' if score >= 80 else 'Reject'
+    }
+
+
+class StubOpenAI:
+    """
+    Minimal threaded stand-in for /v1/chat/completions, /v1/files and /v1/batches.
+
+    Single calls are scored with stub_score; packed calls answer for every
+    RESUME n block except those in drop_ids (or with invalid JSON if
+    garble_packed is set). Batches report in_progress on the first retrieve
+    and completed afterwards.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.drop_ids = set()
+        self.garble_packed = False
+        self.files = {}
+        self.batches = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}/v1'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def complete(self, body):
+        content = body['messages'][-1]['content']
+        packed = re.findall(r'RESUME (\d+):\s*"""(.*?)"""', content, re.S)
+        with self._lock:
+            self.requests.append('packed' if packed else 'single')
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if packed:
+                time.sleep(max(float(re.search(r'Delay: ([\d.]+)', text).group(1)) for _, text in packed))
+                results = [
+                    {'resume_id': int(resume_id), **stub_score(text)}
+                    for resume_id, text in packed if int(resume_id) not in self.drop_ids
+                ]
+                reply = 'not json' if self.garble_packed else json.dumps({'results': results})
+            else:
+                text = re.search(r'RESUME:\s*"""(.*?)"""', content, re.S).group(1)
+                time.sleep(float(re.search(r'Delay: ([\d.]+)', text).group(1)))
+                reply = json.dumps(stub_score(text))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        prompt = sum(len(message['content']) for message in body['messages']) // 4
+        return {
+            'id': 'chatcmpl-stub', 'object': 'chat.completion', 'created': int(time.time()), 'model': body['model'],
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': reply}}],
+            'usage': {'prompt_tokens': prompt, 'completion_tokens': 50, 'total_tokens': prompt + 50}
+        }
+
+    def create_file(self, content_type, body):
+        message = email.message_from_bytes(f'Content-Type: {content_type}\r\n\r\n'.encode() + body)
+        data = next(part.get_payload(decode=True) for part in message.get_payload() if part.get_filename())
+        file_id = f'file-{len(self.files) + 1}'
+        self.files[file_id] = data
+        return self._file_object(file_id)
+
+    def _file_object(self, file_id):
+        return {
+            'id': file_id, 'object': 'file', 'bytes': len(self.files[file_id]), 'created_at': int(time.time()),
+            'filename': f'{file_id}.jsonl', 'purpose': 'batch', 'status': 'processed'
+        }
+
+    def create_batch(self, body):
+        batch_id = f'batch_{len(self.batches) + 1}'
+        self.batches[batch_id] = {
+            'id': batch_id, 'object': 'batch', 'endpoint': body['endpoint'], 'input_file_id': body['input_file_id'],
+            'completion_window': body['completion_window'], 'created_at': int(time.time()), 'status': 'validating',
+            'metadata': body.get('metadata'), 'retrieved': 0
+        }
+        return self._batch_object(batch_id)
+
+    def retrieve_batch(self, batch_id):
+        batch = self.batches[batch_id]
+        batch['retrieved'] += 1
+        if batch['retrieved'] == 1:
+            batch['status'] = 'in_progress'
+        elif batch['status'] != 'completed':
+            lines = []
+            for line in self.files[batch['input_file_id']].decode().splitlines():
+                request = json.loads(line)
+                lines.append(json.dumps({
+                    'id': f'batch_req_{request["custom_id"]}', 'custom_id': request['custom_id'],
+                    'response': {'status_code': 200, 'request_id': 'req', 'body': self.complete(request['body'])}
+                }))
+            output_id = f'file-{len(self.files) + 1}'
+            self.files[output_id] = ('\n'.join(lines) + '\n').encode()
+            batch.update(status='completed', output_file_id=output_id)
+        return self._batch_object(batch_id)
+
+    def _batch_object(self, batch_id):
+        return {key: value for key, value in self.batches[batch_id].items() if key != 'retrieved'}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload, content_type='application/json'):
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path.endswith('/chat/completions'):
+                    self._reply(stub.complete(json.loads(body)))
+                elif self.path.endswith('/files'):
+                    self._reply(stub.create_file(self.headers['Content-Type'], body))
+                elif self.path.endswith('/batches'):
+                    self._reply(stub.create_batch(json.loads(body)))
+                else:
+                    self.send_error(404)
+
+            def do_GET(self):
+                match = re.search(r'/files/([^/]+)/content$', self.path)
+                if match:
+                    self._reply(stub.files[match.group(1)], 'application/octet-stream')
+                elif re.search(r'/batches/[^/]+$', self.path):
+                    self._reply(stub.retrieve_batch(self.path.rsplit('/', 1)[1]))
+                else:
+                    self.send_error(404)
+
+        return Handler
+
+
+class StubOpenAIMixin:
+    """Start a StubOpenAI per test, point OPENAI_BASE_URL at it and use a throwaway score cache."""
+
+    def setUp(self):
+        super().setUp()
+        self.stub = StubOpenAI().start()
+        self.addCleanup(self.stub.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        for patcher in (
+            mock.patch.dict(os.environ, {'OPENAI_BASE_URL': self.stub.url, 'OPENAI_API_KEY': 'sk-test'}),
+            mock.patch.object(score_cache, 'score_cache', DiskCache('scores', path=os.path.join(directory.name, 'scores.sqlite3'))),
+            mock.patch.object(events, 'EVENTS_DIR', os.path.join(directory.name, 'job_events')),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class ScoringEngineStubTests(StubOpenAIMixin, SimpleTestCase):
+    """ScoringEngine against the stub completion server."""
+
+    def test_concurrency_is_bounded_by_the_semaphore(self):
+        items = [(index, make_resume(f'Dev{index}', delay=0.2)) for index in range(6)]
+        with ScoringEngine(concurrency=2, pack_size=0) as engine:
+            results = dict(engine.score_stream(JD_TEXT, items))
+
+        self.assertEqual(sorted(results), list(range(6)))
+        self.assertEqual(self.stub.max_in_flight, 2)
+        self.assertEqual(self.stub.requests, ['single'] * 6)
+        self.assertTrue(all(result['score'] == 85 and result['usage']['prompt_tokens'] for result in results.values()))
+
+    def test_ordered_and_as_completed_delivery(self):
+        items = [('slow', make_resume('Slow', delay=0.3)), ('fast', make_resume('Fast'))]
+
+        async def collect(ordered):
+            engine = ScoringEngine(concurrency=2, pack_size=0)
+            try:
+                return [key async for key, _ in engine.score_many(JD_TEXT, items, ordered=ordered)]
+            finally:
+                await engine.client.close()
+
+        self.assertEqual(asyncio.run(collect(ordered=True)), ['slow', 'fast'])
+        score_cache.score_cache.clear()
+        self.assertEqual(asyncio.run(collect(ordered=False)), ['fast', 'slow'])
+
+    def test_packed_mode_scores_a_pack_in_one_request(self):
+        items = [(name, make_resume(name, skills)) for name, skills in (('Ann', 'Python'), ('Bob', 'Java'), ('Cy', 'Python'))]
+        with ScoringEngine(pack_size=3) as engine:
+            results = dict(engine.score_stream(JD_TEXT, items))
+
+        self.assertEqual(self.stub.requests, ['packed'])
+        self.assertEqual({key: result['candidate_name'] for key, result in results.items()}, {'Ann': 'Ann', 'Bob': 'Bob', 'Cy': 'Cy'})
+        self.assertEqual({key: result['score'] for key, result in results.items()}, {'Ann': 85, 'Bob': 40, 'Cy': 85})
+
+    def test_resumes_missing_from_a_packed_reply_are_rescored(self):
+        self.stub.drop_ids = {2}
+        items = [(name, make_resume(name)) for name in ('Ann', 'Bob', 'Cy')]
+        with ScoringEngine(pack_size=3) as engine:
+            results = dict(engine.score_stream(JD_TEXT, items))
+
+        self.assertEqual(sorted(self.stub.requests), ['packed', 'single'])
+        self.assertEqual(results['Bob']['candidate_name'], 'Bob')
+        # Bob's result carries its single call plus its share of the pack
+        self.assertGreater(results['Bob']['usage']['completion_tokens'], results['Ann']['usage']['completion_tokens'])
+
+    def test_unparseable_packed_reply_falls_back_to_single_calls(self):
+        self.stub.garble_packed = True
+        items = [(name, make_resume(name)) for name in ('Ann', 'Bob', 'Cy')]
+        with ScoringEngine(pack_size=3) as engine:
+            results = dict(engine.score_stream(JD_TEXT, items))
+
+        self.assertEqual(sorted(self.stub.requests), ['packed', 'single', 'single', 'single'])
+        self.assertEqual(sum(result['usage']['completion_tokens'] for result in results.values()), 4 * 50)
+
+
+class RateLimiterTests(SimpleTestCase):
+    """Requests/tokens per minute pacing."""
+
+    def assertBlocks(self, limiter, tokens):
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(limiter.acquire(tokens), 0.2))
+
+    def test_requests_per_minute(self):
+        limiter = RateLimiter(rpm=2)
+        asyncio.run(limiter.acquire(10))
+        asyncio.run(limiter.acquire(10))
+        self.assertBlocks(limiter, 10)
+
+    def test_tokens_per_minute(self):
+        limiter = RateLimiter(tpm=100)
+        asyncio.run(limiter.acquire(60))
+        self.assertBlocks(limiter, 60)
+
+    def test_oversized_request_passes_on_an_empty_window(self):
+        limiter = RateLimiter(tpm=100)
+        asyncio.run(asyncio.wait_for(limiter.acquire(500), 0.2))
+
+
+class BatchModeStubTests(StubOpenAIMixin, TestCase):
+    """Batch-mode submit, poll and ingest against the stub Batch API."""
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(analysis, 'client', OpenAI())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_submit_poll_and_ingest(self):
+        jd = JobDescription.objects.create(title='Backend', description=JD_TEXT, extracted_text=JD_TEXT, file_path='')
+        job = AnalysisJob.objects.create(
+            status='processing', mode='batch', job_description=jd,
+            options={'jd_hashes': {str(jd.id): text_sha256(JD_TEXT)}}
+        )
+        to_score = []
+        for name, skills in (('Ann', 'Python'), ('Bob', 'Java')):
+            resume = ResumeFile.objects.create(path=f'/tmp/{name}.pdf', file_name=f'{name}.pdf', content_hash=name)
+            item = AnalysisItem.objects.create(
+                analysis_job=job, resume=resume, job_description=jd, state='extracted', prescore=50
+            )
+            to_score.append((item, make_resume(name, skills)))
+
+        analysis.submit_batch_job(job, {jd.id: JD_TEXT}, to_score)
+        self.assertTrue(job.batch_id)
+        self.assertEqual(len(self.stub.files['file-1'].splitlines()), 2)
+
+        self.assertFalse(analysis.poll_batch_job(job))
+        self.assertEqual(job.batch_status, 'in_progress')
+        self.assertTrue(analysis.poll_batch_job(job))
+        self.assertTrue(analysis.poll_batch_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_resumes, job.shortlisted_count), ('completed', 2, 1))
+        self.assertGreater(job.prompt_tokens, 0)
+        self.assertEqual(
+            dict(Candidate.objects.values_list('candidate_name', 'status')), {'Ann': 'shortlisted', 'Bob': 'rejected'}
+        )
+        self.assertEqual(set(job.items.values_list('state', flat=True)), {'scored'})
@@ -0,0 +1,221 @@
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from api import analysis, events
+from api.analysis import build_jd_text
+from api.models import AnalysisJob, JobDescription
+from src.core.compaction import TRUNCATION_MARK, _truncate, compact_jd, fit_to_budget
+from src.utils.metrics import MetricsStore
+from src.utils.tokens import estimate_tokens
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class RunAnalysisWorkerCommandTests(TestCase):
+    """Smoke tests for `manage.py run_analysis_worker`."""
+
+    def test_command_loads_from_backend_dir_without_pythonpath(self):
+        # Launched the documented way (cd backend; python manage.py ...), src must be importable
+        env = {key: value for key, value in os.environ.items() if key != 'PYTHONPATH'}
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'run_analysis_worker', '--help'],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('--once', result.stdout)
+
+    def test_once_with_empty_queue_returns(self):
+        out = StringIO()
+        call_command('run_analysis_worker', '--once', '--worker-id', 'test-worker', stdout=out)
+
+
+class AnalyzeResumesValidationTests(TestCase):
+    """Request validation of POST /api/analyze-resumes/."""
+
+    def setUp(self):
+        self.jd = JobDescription.objects.create(title='Engineer', description='Python', extracted_text='Python')
+
+    def post(self, data):
+        return self.client.post(reverse('analyze-resumes'), data, content_type='application/json')
+
+    def test_non_integer_job_description_ids_are_rejected(self):
+        response = self.post({'job_description_ids': ['abc']})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('job_description_ids', response.json()['errors'])
+
+    def test_invalid_options_are_rejected(self):
+        for data in ({'mode': 'fast'}, {'pack_size': -1}, {'prefilter_top_n': 'ten'}, {'prefilter_min_score': 101}):
+            with self.subTest(data=data):
+                self.assertEqual(self.post(data).status_code, 400)
+        self.assertFalse(AnalysisJob.objects.exists())
+
+    def test_dry_run_false_string_queues_the_job(self):
+        response = self.post({'job_description_ids': [str(self.jd.id)], 'pack_size': '4', 'dry_run': 'false'})
+        self.assertEqual(response.status_code, 202)
+        job = AnalysisJob.objects.get(id=response.json()['job_id'])
+        self.assertEqual(job.options, {'prefilter_min_score': None, 'prefilter_top_n': None, 'pack_size': 4})
+
+
+class SkillEndpointParamsTests(TestCase):
+    """Query/body parameter validation of the skills and rerank endpoints."""
+
+    def test_bad_skills_limit_is_rejected(self):
+        for limit in ('abc', '0', '-5'):
+            with self.subTest(limit=limit):
+                response = self.client.get(reverse('candidate-skills'), {'limit': limit})
+                self.assertEqual(response.status_code, 400)
+
+    def test_skills_limit_is_clamped(self):
+        response = self.client.get(reverse('candidate-skills'), {'limit': '1000000'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_bad_rerank_params_are_rejected(self):
+        for data in ({'skills': ['python'], 'top_n': 'ten'}, {'skills': ['python'], 'top_n': -1},
+                     {'skills': ['python'], 'job_description': 'abc'}):
+            with self.subTest(data=data):
+                response = self.client.post(reverse('candidate-rerank'), data, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+
+    def test_rerank_with_large_top_n(self):
+        data = {'skills': ['python'], 'top_n': 100000}
+        response = self.client.post(reverse('candidate-rerank'), data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+
+class CompactionTests(SimpleTestCase):
+    """Token-budget truncation of JD and resume text."""
+
+    def test_single_long_line_is_cut_not_dropped(self):
+        text = _truncate('x' * 10000, 100)
+        self.assertTrue(text.startswith('xxxx'))
+        self.assertTrue(text.endswith(TRUNCATION_MARK))
+        self.assertLessEqual(estimate_tokens(text), 100)
+
+    def test_long_single_line_jd_keeps_its_start(self):
+        jd = compact_jd('Senior engineer. ' * 2000)
+        self.assertTrue(jd.startswith('Senior engineer.'))
+        self.assertTrue(jd.endswith(TRUNCATION_MARK))
+
+    def test_single_line_resume_section_survives_budget(self):
+        text = fit_to_budget('Experience\n' + 'Built services in Python. ' * 500, 200)
+        self.assertIn('Built services in Python.', text)
+        self.assertLessEqual(estimate_tokens(text), 210)
+
+
+class JDTextTests(SimpleTestCase):
+
+    def test_text_jd_uses_real_newlines(self):
+        jd = JobDescription(title='Engineer', description='Build APIs', requirements='Python', file_path='')
+        self.assertEqual(build_jd_text(jd), 'Engineer\n\nBuild APIs\n\nRequirements:\nPython')
+
+
+class AnalysisJobEventsTests(TestCase):
+    """Offsets of the analysis job SSE stream."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(events, 'EVENTS_DIR', directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bad_offset_is_rejected(self):
+        job = AnalysisJob.objects.create(status='queued')
+        url = reverse('analysis-job-events', args=[job.id])
+        for offset in ('abc', '-1'):
+            with self.subTest(offset=offset):
+                self.assertEqual(self.client.get(url, {'offset': offset}).status_code, 400)
+        self.assertEqual(self.client.get(url, HTTP_LAST_EVENT_ID='abc').status_code, 400)
+
+    def test_offset_past_a_reset_log_restarts_from_the_beginning(self):
+        events.publish(1, 'progress', {'processed': 1})
+        events.publish(1, 'progress', {'processed': 2})
+        stale_offset = events.read_events(1)[-1][0]
+        events.reset(1)
+        events.publish(1, 'status', {'status': 'queued'})
+        self.assertEqual([event for _, event, _ in events.read_events(1, stale_offset)], ['status'])
+
+
+class PollBatchJobClaimTests(TestCase):
+    """Only one poll may ingest a finished batch."""
+
+    def setUp(self):
+        patcher = mock.patch.object(analysis, 'get_batch', return_value=mock.Mock(id='batch_1', status='completed'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_job(self, **fields):
+        return AnalysisJob.objects.create(status='processing', mode='batch', batch_id='batch_1', **fields)
+
+    def test_batch_claimed_by_another_poll_is_not_ingested(self):
+        job = self.create_job(batch_status=analysis.BATCH_INGESTING, heartbeat_at=timezone.now())
+        with mock.patch.object(analysis, 'ingest_batch_results') as ingest:
+            self.assertFalse(analysis.poll_batch_job(job))
+        ingest.assert_not_called()
+
+    def test_stale_claim_is_taken_over(self):
+        stale = timezone.now() - timedelta(seconds=analysis.BATCH_INGEST_STALE_SECONDS + 1)
+        job = self.create_job(batch_status=analysis.BATCH_INGESTING, heartbeat_at=stale)
+        with mock.patch.object(analysis, 'ingest_batch_results') as ingest:
+            self.assertTrue(analysis.poll_batch_job(job))
+        ingest.assert_called_once()
+
+    def test_second_poll_of_an_ingested_batch_does_nothing(self):
+        job = self.create_job(batch_status='in_progress')
+        stale_copy = AnalysisJob.objects.get(id=job.id)
+        with mock.patch.object(analysis, 'ingest_batch_results', side_effect=lambda job, *args: analysis.finish_job(job, 'completed')) as ingest:
+            self.assertTrue(analysis.poll_batch_job(job))
+            self.assertTrue(analysis.poll_batch_job(stale_copy))
+        ingest.assert_called_once()
+
+
+class RetryAnalysisJobTests(TestCase):
+    """Request validation of POST /api/analysis-jobs/{id}/retry/."""
+
+    def test_invalid_item_ids_are_rejected(self):
+        job = AnalysisJob.objects.create(status='failed')
+        url = reverse('analysisjob-retry', args=[job.id])
+        for item_ids in ('4', ['abc'], [0], {'id': 4}):
+            with self.subTest(item_ids=item_ids):
+                response = self.client.post(url, {'item_ids': item_ids}, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_retry_with_item_ids_requeues(self):
+        job = AnalysisJob.objects.create(status='failed')
+        url = reverse('analysisjob-retry', args=[job.id])
+        response = self.client.post(url, {'item_ids': [4, '7']}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+
+
+class MetricsStoreTests(SimpleTestCase):
+    """Buffered metric recording."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = MetricsStore(path=os.path.join(directory.name, 'metrics.sqlite3'), flush_seconds=60)
+
+    def test_updates_are_buffered_until_flushed(self):
+        self.store.inc('hr_errors_total', operation='scoring')
+        self.store.observe('hr_llm_request_seconds', 0.2, kind='scoring')
+        self.store.observe('hr_llm_request_seconds', 0.4, kind='scoring')
+        self.assertFalse(os.path.exists(self.store.path))
+
+        # Reads flush first
+        self.assertEqual(self.store.value('hr_errors_total', operation='scoring'), 1)
+        self.assertEqual(self.store.count('hr_llm_request_seconds', kind='scoring'), 2)
+        self.assertAlmostEqual(self.store.mean('hr_llm_request_seconds', kind='scoring'), 0.3)
+        self.assertIn('hr_llm_request_seconds_bucket{kind="scoring",le="0.25"} 1', self.store.render())
@@ -8,6 +8,7 @@ router.register(r'job-descriptions', views.JobDescriptionViewSet, basename='jobd
 router.register(r'analysis-jobs', views.AnalysisJobViewSet, basename='analysisjob')
 
 urlpatterns = [
+    path('analysis-jobs/<int:pk>/events/', views.analysis_job_events, name='analysis-job-events'),
     path('', include(router.urls)),
     path('sync-drive/', views.sync_drive, name='sync-drive'),
     path('upload-resume/', views.upload_resume, name='upload-resume'),
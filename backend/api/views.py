@@ -8,22 +8,48 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.utils import timezone
 from django.conf import settings
 from django.db import models
+from django.http import StreamingHttpResponse, JsonResponse, HttpResponse
+from django.views.decorators.http import require_GET
 from .models import Candidate, JobDescription, AnalysisJob
-from .serializers import CandidateSerializer, JobDescriptionSerializer, AnalysisJobSerializer
+from .serializers import (
+    CandidateSerializer, JobDescriptionSerializer, AnalysisJobSerializer, AnalysisItemSerializer, AnalyzeResumesSerializer,
+    RetryAnalysisJobSerializer
+)
 
 # Add the parent directory to sys.path to import from src
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
-from openai import OpenAI
 from dotenv import load_dotenv
 from src.integrations.drive_ingestor import download_new_cvs
 from src.extractor.pdf_reader import extract_text
-from src.core.ats_scorer import score_resume
 from src.integrations.notifier import send_interview_email, send_appointment_letter_email
+from src.utils.metrics import render_prometheus
+from .analysis import (
+    poll_batch_job, retry_analysis_job, resume_folders, job_summary, estimate_analysis, get_jd_text, refresh_jd_text
+)
+from .events import format_sse, stream_events
+from .skills import get_skill_matrix
+from src.core.skill_matrix import normalize_skill
 
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+# Upper bounds for the page sizes of the skills and rerank endpoints
+SKILLS_MAX_LIMIT = 1000
+RERANK_MAX_TOP_N = 500
+
+
+def parse_count(value, default, maximum):
+    """
+    Parse a positive count from a request, clamped to maximum.
+
+    Raises:
+        ValueError: If value is not an integer of at least 1
+    """
+    count = default if value in (None, '') else int(value)
+    if count < 1:
+        raise ValueError(f'{value} is not a positive integer')
+    return min(count, maximum)
 
 
 class JobDescriptionViewSet(viewsets.ModelViewSet):
@@ -139,6 +165,14 @@ class CandidateViewSet(viewsets.ModelViewSet):
     queryset = Candidate.objects.all()
     serializer_class = CandidateSerializer
     
+    def get_queryset(self):
+        """Optionally restrict to candidates scored against one JD (?job_description=<id>)"""
+        queryset = super().get_queryset()
+        jd_id = self.request.query_params.get('job_description')
+        if jd_id:
+            queryset = queryset.filter(job_description_id=jd_id)
+        return queryset
+    
     @action(detail=False, methods=['get'])
     def shortlisted(self, request):
         """Get all shortlisted candidates"""
@@ -161,6 +195,82 @@ class CandidateViewSet(viewsets.ModelViewSet):
             'average_score': round(avg_score, 2)
         })
     
+    @action(detail=False, methods=['get'])
+    def skills(self, request):
+        """Skill vocabulary across all candidates, most common first (?limit=100)"""
+        try:
+            limit = parse_count(request.query_params.get('limit'), 100, SKILLS_MAX_LIMIT)
+        except (TypeError, ValueError):
+            return Response({
+                'success': False,
+                'message': f'limit must be an integer between 1 and {SKILLS_MAX_LIMIT}'
+            }, status=400)
+        frequencies = get_skill_matrix().frequencies()
+        ranked = sorted(frequencies.items(), key=lambda item: -item[1])[:limit]
+        return Response([{'skill': skill, 'candidates': count} for skill, count in ranked])
+    
+    @action(detail=False, methods=['post'])
+    def rerank(self, request):
+        """Rank candidates by a weighted skill vector, without any LLM call"""
+        weights = request.data.get('skills')
+        if isinstance(weights, list):
+            weights = {skill: 1 for skill in weights}
+        try:
+            weights = {str(skill): float(weight) for skill, weight in (weights or {}).items()}
+        except (AttributeError, TypeError, ValueError):
+            return Response({
+                'success': False,
+                'message': 'skills must be a list of skills or an object of skill -> numeric weight'
+            }, status=400)
+        try:
+            top_n = parse_count(request.data.get('top_n'), 50, RERANK_MAX_TOP_N)
+        except (TypeError, ValueError):
+            return Response({
+                'success': False,
+                'message': f'top_n must be an integer between 1 and {RERANK_MAX_TOP_N}'
+            }, status=400)
+        
+        if not weights:
+            return Response({
+                'success': False,
+                'message': 'At least one skill is required'
+            }, status=400)
+        
+        started = timezone.now()
+        matrix = get_skill_matrix()
+        
+        # Optionally restrict to one JD's candidates (?job_description=<id> or in the body)
+        jd_id = request.data.get('job_description') or request.query_params.get('job_description')
+        candidate_ids = None
+        if jd_id and not str(jd_id).isdigit():
+            return Response({
+                'success': False,
+                'message': 'job_description must be a job description id'
+            }, status=400)
+        if jd_id:
+            candidate_ids = list(Candidate.objects.filter(job_description_id=jd_id).values_list('id', flat=True))
+        ranking, unknown = matrix.rank(weights, top_n=top_n, candidate_ids=candidate_ids)
+        
+        candidates = Candidate.objects.in_bulk([candidate_id for candidate_id, _ in ranking])
+        requested = {normalize_skill(skill) for skill in weights}
+        results = []
+        for candidate_id, skill_score in ranking:
+            if candidate_id not in candidates:
+                continue
+            results.append({
+                **self.get_serializer(candidates[candidate_id]).data,
+                'skill_score': skill_score,
+                'matched_requested_skills': [skill for skill in matrix.skills_of(candidate_id) if skill in requested]
+            })
+        
+        return Response({
+            'success': True,
+            'results': results,
+            'unknown_skills': unknown,
+            'candidates_ranked': len(matrix) if candidate_ids is None else len(candidate_ids),
+            'took_ms': round((timezone.now() - started).total_seconds() * 1000, 1)
+        })
+    
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         """Manually update candidate status"""
@@ -355,6 +465,10 @@ class JobDescriptionViewSet(viewsets.ModelViewSet):
     serializer_class = JobDescriptionSerializer
     parser_classes = (MultiPartParser, FormParser, JSONParser)
     
+    def perform_update(self, serializer):
+        # Edits change what candidates are scored against, so re-extract the stored text
+        refresh_jd_text(serializer.save())
+    
     @action(detail=False, methods=['get'])
     def active(self, request):
         """Get the active job description"""
@@ -392,6 +506,7 @@ class JobDescriptionViewSet(viewsets.ModelViewSet):
                 is_active=True,
                 file_path=''
             )
+            refresh_jd_text(jd)
             
             serializer = self.get_serializer(jd)
             return Response(serializer.data, status=201)
@@ -420,7 +535,7 @@ class JobDescriptionViewSet(viewsets.ModelViewSet):
                 for chunk in file.chunks():
                     destination.write(chunk)
             
-            # Extract text from PDF
+            # Extract text from PDF once; analysis runs reuse the stored text
             jd_text = extract_text(str(file_path))
             
             # Deactivate all existing JDs
@@ -431,6 +546,7 @@ class JobDescriptionViewSet(viewsets.ModelViewSet):
                 title=title,
                 description=jd_text[:5000] if jd_text else 'PDF uploaded',
                 file_path=str(file_path),
+                extracted_text=jd_text or '',
                 is_active=True
             )
             
@@ -450,6 +566,7 @@ class JobDescriptionViewSet(viewsets.ModelViewSet):
             jd = self.get_object()
             jd.is_active = True
             jd.save()
+            get_jd_text(jd)
             
             serializer = self.get_serializer(jd)
             return Response(serializer.data)
@@ -470,6 +587,92 @@ class AnalysisJobViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(job)
             return Response(serializer.data)
         return Response({'error': 'No analysis jobs found'}, status=404)
+    
+    @action(detail=True, methods=['post'])
+    def poll_batch(self, request, pk=None):
+        """Check a batch-mode job and ingest its results once the OpenAI batch finishes"""
+        job = self.get_object()
+        if job.mode != 'batch' or not job.batch_id:
+            return Response({'error': 'Not a batch analysis job'}, status=400)
+        
+        try:
+            done = poll_batch_job(job, resume_folders())
+        except Exception as e:
+            return Response({'error': str(e)}, status=502)
+        
+        serializer = self.get_serializer(job)
+        return Response({'done': done, 'job': serializer.data})
+    
+    @action(detail=True, methods=['get'])
+    def items(self, request, pk=None):
+        """List the per-resume work items of a job (optionally ?state=failed)"""
+        job = self.get_object()
+        items = job.items.select_related('resume')
+        state = request.query_params.get('state')
+        if state:
+            items = items.filter(state=state)
+        serializer = AnalysisItemSerializer(items, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['post'])
+    def retry(self, request, pk=None):
+        """Requeue a stopped job: resume unfinished items and retry failed ones (optionally only item_ids)"""
+        job = self.get_object()
+        if job.status in ('queued', 'processing'):
+            return Response({'error': f'Job is already {job.status}'}, status=400)
+        
+        params = RetryAnalysisJobSerializer(data=request.data)
+        if not params.is_valid():
+            return Response({
+                'success': False,
+                'message': '; '.join(f'{field}: {" ".join(map(str, errors))}' for field, errors in params.errors.items()),
+                'errors': params.errors
+            }, status=400)
+        
+        reset = retry_analysis_job(job, params.validated_data['item_ids'])
+        serializer = self.get_serializer(job)
+        return Response({
+            'success': True,
+            'message': f'Job requeued. {reset} failed item(s) will be retried.',
+            'job': serializer.data
+        })
+
+
+@require_GET
+def analysis_job_events(request, pk):
+    """Server-Sent Events stream of an analysis job's progress, results and final summary"""
+    try:
+        job = AnalysisJob.objects.get(pk=pk)
+    except AnalysisJob.DoesNotExist:
+        return JsonResponse({'error': 'Analysis job not found'}, status=404)
+    
+    # EventSource sends the id of the last event it saw when it reconnects
+    try:
+        offset = int(request.headers.get('Last-Event-ID') or request.GET.get('offset') or 0)
+        if offset < 0:
+            raise ValueError(offset)
+    except ValueError:
+        return JsonResponse({'error': 'Last-Event-ID / offset must be a non-negative integer'}, status=400)
+    
+    def stream():
+        if not offset:
+            yield format_sse('status', job_summary(job))
+        if job.status in ('completed', 'failed') and not offset:
+            yield format_sse('done', job_summary(job))
+            return
+        # Reconnect periodically so server threads are not held forever
+        yield from stream_events(job.id, offset, timeout=300)
+    
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+def metrics(request):
+    """Pipeline timings, token usage and error counters in the Prometheus text format"""
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 @api_view(['POST'])
@@ -526,127 +729,70 @@ def upload_resume(request):
 
 @api_view(['POST'])
 def analyze_resumes(request):
-    """Analyze all resumes against the job description"""
+    """Queue analysis of all resumes against the job description"""
     
-    # Create analysis job
-    analysis_job = AnalysisJob.objects.create(status='queued')
+    params = AnalyzeResumesSerializer(data=request.data)
+    if not params.is_valid():
+        return Response({
+            'success': False,
+            'message': '; '.join(f'{field}: {" ".join(map(str, errors))}' for field, errors in params.errors.items()),
+            'errors': params.errors
+        }, status=400)
+    mode = params.validated_data['mode']
     
-    try:
-        analysis_job.status = 'processing'
-        analysis_job.started_at = timezone.now()
-        analysis_job.save()
-        
-        # Get active job description
-        active_jd = JobDescription.objects.filter(is_active=True).first()
-        if not active_jd:
-            raise Exception("No active job description found. Please create one first.")
-        
-        # Get JD text from database or file
-        if active_jd.file_path and Path(active_jd.file_path).exists():
-            jd_text = extract_text(active_jd.file_path)
-        else:
-            jd_text = f"{active_jd.title}\\n\\n{active_jd.description}\\n\\nRequirements:\\n{active_jd.requirements}"
-        
-        if not jd_text:
-            raise Exception("Could not extract job description text")
-        
-        # Link analysis job to JD
-        analysis_job.job_description = active_jd
-        analysis_job.save()
-        
-        # Get all resumes from both folders
-        resume_folder_drive = settings.BASE_DIR / "data" / "resumes"  # From Drive sync
-        resume_folder_upload = settings.BASE_DIR / "data" / "local_upload"  # From manual upload
-        
-        # Collect resume files from both folders
-        resume_files = []
-        if resume_folder_drive.exists():
-            resume_files.extend(list(resume_folder_drive.glob("*.pdf")))
-        if resume_folder_upload.exists():
-            resume_files.extend(list(resume_folder_upload.glob("*.pdf")))
-        
-        analysis_job.total_resumes = len(resume_files)
-        analysis_job.save()
-        
-        if not resume_files:
-            raise Exception("No resume files found in data/resumes or data/local_upload")
-        
-        # Process each resume (keep existing candidates, just add new ones)
-        for resume_file in resume_files:
-            try:
-                resume_text = extract_text(str(resume_file))
-                result = score_resume(jd_text, resume_text, client)
-                
-                if result:
-                    # Create candidate record
-                    candidate = Candidate.objects.create(
-                        candidate_name=result.get('candidate_name', 'Unknown'),
-                        email=result.get('email', 'Not Provided'),
-                        phone=result.get('phone', 'Not Provided'),
-                        years_of_experience=result.get('years_of_experience', 'Not Provided'),
-                        score=result.get('score', 0),
-                        fitness_reasoning=result.get('fitness_reasoning', ''),
-                        matching_skills=result.get('matching_skills', ''),
-                        missing_skills=result.get('missing_skills', ''),
-                        verdict=result.get('verdict', 'Pending'),
-                        status='shortlisted' if result.get('score', 0) >= 80 else 'rejected',
-                        resume_file=resume_file.name
-                    )
-                    
-                    if candidate.score >= 80:
-                        analysis_job.shortlisted_count += 1
-                
-                analysis_job.processed_resumes += 1
-                analysis_job.save()
-                
-            except Exception as e:
-                print(f"Error processing {resume_file.name}: {e}")
-                continue
-        
-        # Mark job as completed
-        analysis_job.status = 'completed'
-        analysis_job.completed_at = timezone.now()
-        analysis_job.save()
-        
-        # Clear resume folders after successful analysis
-        import shutil
+    # Optional fan-out: score every resume against several JDs (extracting each only once)
+    jd_ids = params.validated_data['job_description_ids']
+    if jd_ids:
+        jds = list(JobDescription.objects.filter(id__in=jd_ids))
+        missing = set(jd_ids) - {jd.id for jd in jds}
+        if missing:
+            return Response({
+                'success': False,
+                'message': f'Job description(s) not found: {", ".join(map(str, sorted(missing)))}'
+            }, status=400)
+    else:
+        jds = list(JobDescription.objects.filter(is_active=True)[:1])
+        if not jds:
+            return Response({
+                'success': False,
+                'message': 'No active job description found. Please create one first.'
+            }, status=400)
+    
+    options = {
+        key: params.validated_data[key] for key in ('prefilter_min_score', 'prefilter_top_n', 'pack_size')
+    }
+    
+    # Dry run: predict calls, tokens, cost and duration without queueing anything
+    if params.validated_data['dry_run']:
         try:
-            if resume_folder_drive.exists():
-                for file in resume_folder_drive.glob("*.pdf"):
-                    file.unlink()
-                print(f"✅ Cleared {resume_folder_drive}")
-            
-            if resume_folder_upload.exists():
-                for file in resume_folder_upload.glob("*.pdf"):
-                    file.unlink()
-                print(f"✅ Cleared {resume_folder_upload}")
+            estimate = estimate_analysis(jds, mode, options)
         except Exception as e:
-            print(f"⚠️ Warning: Could not clear resume folders: {str(e)}")
-        
-        # Get shortlisted candidates
-        shortlisted = Candidate.objects.filter(score__gte=80).order_by('-score')
-        serializer = CandidateSerializer(shortlisted, many=True)
-        
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=400)
         return Response({
             'success': True,
-            'message': f'Analysis completed. {analysis_job.shortlisted_count} candidates shortlisted. Resume folders cleared.',
-            'job_id': analysis_job.id,
-            'total_processed': analysis_job.processed_resumes,
-            'shortlisted_count': analysis_job.shortlisted_count,
-            'candidates': serializer.data
+            'dry_run': True,
+            'mode': mode,
+            'estimate': estimate
         })
-        
-    except Exception as e:
-        analysis_job.status = 'failed'
-        analysis_job.error_message = str(e)
-        analysis_job.completed_at = timezone.now()
-        analysis_job.save()
-        
-        return Response({
-            'success': False,
-            'message': f'Analysis failed: {str(e)}',
-            'job_id': analysis_job.id
-        }, status=500)
+    
+    # The run_analysis_worker process picks the job up from the database
+    analysis_job = AnalysisJob.objects.create(
+        status='queued',
+        mode=mode,
+        job_description=jds[0] if len(jds) == 1 else None,
+        options=options
+    )
+    analysis_job.job_descriptions.set(jds)
+    
+    return Response({
+        'success': True,
+        'message': 'Analysis queued.',
+        'job_id': analysis_job.id,
+        'status': analysis_job.status
+    }, status=202)
 
 
 @api_view(['POST'])
@@ -774,7 +920,7 @@ def send_bulk_appointment_letters(request):
 @api_view(['GET'])
 def dashboard_stats(request):
     """Get dashboard statistics"""
-    from django.db.models import Avg
+    from django.db.models import Avg, Sum
     
     total = Candidate.objects.count()
     shortlisted = Candidate.objects.filter(score__gte=80).count()
@@ -782,6 +928,16 @@ def dashboard_stats(request):
     pending = Candidate.objects.filter(status='pending').count()
     avg_score = Candidate.objects.aggregate(avg=Avg('score'))['avg'] or 0
     
+    # OpenAI usage of all analysis runs, and of the current calendar month
+    usage_fields = {
+        'prompt_tokens': Sum('prompt_tokens'),
+        'completion_tokens': Sum('completion_tokens'),
+        'estimated_cost': Sum('estimated_cost')
+    }
+    month_start = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    usage = AnalysisJob.objects.aggregate(**usage_fields)
+    month_usage = AnalysisJob.objects.filter(created_at__gte=month_start).aggregate(**usage_fields)
+    
     # Get recent analysis jobs
     recent_jobs = AnalysisJob.objects.all()[:5]
     
@@ -791,6 +947,12 @@ def dashboard_stats(request):
         'notified': notified,
         'pending': pending,
         'average_score': round(avg_score, 2),
+        'token_usage': {
+            'prompt_tokens': usage['prompt_tokens'] or 0,
+            'completion_tokens': usage['completion_tokens'] or 0,
+            'estimated_cost': round(usage['estimated_cost'] or 0, 4),
+            'month_estimated_cost': round(month_usage['estimated_cost'] or 0, 4)
+        },
         'recent_jobs': AnalysisJobSerializer(recent_jobs, many=True).data
     })
 
@@ -0,0 +1,138 @@
+"""
+DB-backed runner for AnalysisJob rows.
+
+The web process only enqueues jobs; a separate `manage.py run_analysis_worker`
+process claims them from the database, so no message broker is needed and
+queued work survives web-server restarts.
+"""
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from django.db import close_old_connections, connection
+from django.utils import timezone
+from .models import AnalysisJob
+from src.utils.metrics import inc
+from .analysis import run_analysis_job, poll_batch_job, finish_job, resume_folders
+
+# Seconds between heartbeats of a running job, and after which a silent job is reclaimed
+HEARTBEAT_SECONDS = int(os.getenv("ANALYSIS_HEARTBEAT_SECONDS", "15"))
+STALE_JOB_SECONDS = int(os.getenv("ANALYSIS_STALE_JOB_SECONDS", "120"))
+
+# Seconds between OpenAI Batch API status checks for batch-mode jobs
+BATCH_POLL_SECONDS = int(os.getenv("BATCH_POLL_SECONDS", "300"))
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(worker_id):
+    """
+    Atomically claim the oldest queued job, or an interactive job whose worker
+    stopped sending heartbeats.
+
+    Returns:
+        The claimed AnalysisJob, or None if there is nothing to do
+    """
+    stale_before = timezone.now() - timedelta(seconds=STALE_JOB_SECONDS)
+    candidates = (
+        AnalysisJob.objects.filter(status='queued')
+        | AnalysisJob.objects.filter(status='processing', batch_id='', heartbeat_at__lt=stale_before)
+    ).order_by('created_at').values_list('id', 'status', 'heartbeat_at')
+
+    for job_id, job_status, heartbeat_at in candidates:
+        now = timezone.now()
+        # Conditional update: only one worker can win the row. A reclaimed job keeps its
+        # checkpointed counters and items and resumes where it stopped.
+        claimed = AnalysisJob.objects.filter(
+            id=job_id, status=job_status, heartbeat_at=heartbeat_at
+        ).update(status='processing', worker_id=worker_id, heartbeat_at=now, started_at=now)
+        if claimed:
+            if job_status == 'processing':
+                print(f"♻️  Reclaimed stale analysis job {job_id}")
+                inc("hr_retries_total", operation="reclaim_job")
+            return AnalysisJob.objects.get(id=job_id)
+    return None
+
+
+class Heartbeat:
+    """Background thread that keeps a claimed job's heartbeat_at fresh."""
+
+    def __init__(self, analysis_job, interval=HEARTBEAT_SECONDS):
+        self.analysis_job = analysis_job
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{analysis_job.id}", daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                now = timezone.now()
+                AnalysisJob.objects.filter(id=self.analysis_job.id, status='processing').update(heartbeat_at=now)
+                # Keep the in-memory copy current so a full save() never writes an old heartbeat back
+                self.analysis_job.heartbeat_at = now
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def process_job(analysis_job):
+    """Run one claimed job and record failure on the job instead of raising."""
+    print(f"▶️  Running analysis job {analysis_job.id} ({analysis_job.mode})")
+    try:
+        with Heartbeat(analysis_job):
+            run_analysis_job(analysis_job)
+        print(f"✅ Analysis job {analysis_job.id} {analysis_job.status}")
+    except Exception as e:
+        traceback.print_exc()
+        finish_job(analysis_job, 'failed', str(e))
+
+
+def poll_batch_jobs():
+    """Check every submitted batch-mode job once."""
+    pending = AnalysisJob.objects.filter(mode='batch', status='processing').exclude(batch_id='')
+    for analysis_job in pending:
+        try:
+            poll_batch_job(analysis_job, resume_folders())
+        except Exception as e:
+            print(f"Error polling batch for job {analysis_job.id}: {e}")
+
+
+def run_worker(worker_id=None, poll_interval=2.0, once=False):
+    """
+    Main worker loop.
+
+    Args:
+        worker_id: Identifier stored on claimed jobs (defaults to host:pid)
+        poll_interval: Seconds to sleep when the queue is empty
+        once: Process at most one job and one batch poll, then return
+    """
+    worker_id = worker_id or default_worker_id()
+    print(f"👷 Analysis worker {worker_id} started")
+    last_batch_poll = 0.0
+
+    while True:
+        close_old_connections()
+
+        if time.monotonic() - last_batch_poll >= BATCH_POLL_SECONDS or once:
+            poll_batch_jobs()
+            last_batch_poll = time.monotonic()
+
+        analysis_job = claim_next_job(worker_id)
+        if analysis_job:
+            process_job(analysis_job)
+
+        if once:
+            return
+        if not analysis_job:
+            time.sleep(poll_interval)
@@ -69,9 +69,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,  # Wait for the analysis worker's write transactions instead of failing
+        },
     }
 }
 
+# Opt-in: put SQLite in WAL mode so dashboard reads don't block on the analysis worker's writes
+# (off by default, as it converts the database file and adds -wal/-shm files next to it)
+SQLITE_WAL = os.getenv('SQLITE_WAL', '0') == '1'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -2,6 +2,10 @@
 """Django's command-line utility for administrative tasks."""
 import os
 import sys
+from pathlib import Path
+
+# Project root, so the API and management commands (e.g. run_analysis_worker) can import src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 
 def main():
@@ -20,6 +20,12 @@ python manage.py migrate --noinput || true
 echo "📦 Collecting static files..."
 python manage.py collectstatic --noinput || true
 
+# Start analysis worker in background (claims queued AnalysisJob rows)
+echo "👷 Starting analysis worker..."
+nohup python manage.py run_analysis_worker > /app/outputs/analysis_worker.log 2>&1 &
+WORKER_PID=$!
+echo "✅ Analysis worker started (PID: $WORKER_PID)"
+
 # Start Django server
 echo "🌐 Starting Django server on 0.0.0.0:5512..."
 exec python manage.py runserver 0.0.0.0:5512
@@ -189,6 +189,7 @@ async function loadDashboardStats() {
                             <p style="font-size: 0.875rem; color: var(--text-secondary); margin-top: 0.25rem;">
                                 ${job.processed_resumes}/${job.total_resumes} processed
                                 ${job.shortlisted_count > 0 ? `• ${job.shortlisted_count} shortlisted` : ''}
+                                ${job.prompt_tokens > 0 ? `• ${(job.prompt_tokens + job.completion_tokens).toLocaleString()} tokens (~$${job.estimated_cost.toFixed(2)})` : ''}
                             </p>
                         </div>
                         <div>
@@ -521,7 +522,12 @@ async function analyzeResumes() {
             method: 'POST'
         });
         
-        const data = await response.json();
+        let data = await response.json();
+        
+        if (data.success) {
+            // Analysis runs in the background worker; poll the job for progress
+            data = await waitForAnalysisJob(data.job_id);
+        }
         
         document.getElementById('progress-fill').style.width = '100%';
         
@@ -572,6 +578,69 @@ async function analyzeResumes() {
     }
 }
 
+function showAnalysisProgress(job) {
+    const percent = job.total_resumes ? Math.round(job.processed_resumes / job.total_resumes * 100) : 0;
+    document.getElementById('progress-text').textContent = job.status === 'queued'
+        ? 'Waiting for analysis worker...'
+        : `Analyzing resumes... ${job.processed_resumes}/${job.total_resumes}`;
+    document.getElementById('progress-fill').style.width = `${Math.max(10, percent)}%`;
+}
+
+function analysisOutcome(job) {
+    if (job.status === 'completed') {
+        return {
+            success: true,
+            total_processed: job.processed_resumes,
+            shortlisted_count: job.shortlisted_count
+        };
+    }
+    return { success: false, message: `Analysis failed: ${job.error_message}` };
+}
+
+function waitForAnalysisJob(jobId) {
+    // Progress is pushed over Server-Sent Events; fall back to polling if the stream is unavailable
+    if (!window.EventSource) {
+        return pollAnalysisJob(jobId);
+    }
+    
+    return new Promise(resolve => {
+        const source = new EventSource(`${API_BASE_URL}/analysis-jobs/${jobId}/events/`);
+        let received = false;
+        
+        const onProgress = event => {
+            received = true;
+            showAnalysisProgress(JSON.parse(event.data));
+        };
+        source.addEventListener('status', onProgress);
+        source.addEventListener('progress', onProgress);
+        source.addEventListener('done', event => {
+            source.close();
+            resolve(analysisOutcome(JSON.parse(event.data)));
+        });
+        source.onerror = () => {
+            // EventSource reconnects by itself once a stream has worked
+            if (!received) {
+                source.close();
+                resolve(pollAnalysisJob(jobId));
+            }
+        };
+    });
+}
+
+async function pollAnalysisJob(jobId) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        
+        const response = await fetch(`${API_BASE_URL}/analysis-jobs/${jobId}/`);
+        const job = await response.json();
+        
+        if (job.status === 'completed' || job.status === 'failed') {
+            return analysisOutcome(job);
+        }
+        showAnalysisProgress(job);
+    }
+}
+
 // Notification Functions
 async function loadNotificationPreview() {
     try {
@@ -6,7 +6,9 @@ from dotenv import load_dotenv
 # Importing custom modules
 from src.integrations.drive_ingestor import download_new_cvs
 from src.extractor.pdf_reader import extract_text
-from src.core.ats_scorer import score_resume
+from src.extractor.batch_reader import iter_extract_documents
+from src.core.scoring_engine import ScoringEngine
+from src.core.prefilter import prescore_resumes, select_for_scoring
 from src.integrations.notifier import send_interview_email
 
 load_dotenv()
@@ -41,12 +43,32 @@ def run_hr_pipeline():
         print("No resumes found to process.")
         return
 
-    for file in os.listdir(resume_folder):
-        if file.lower().endswith(".pdf"):
-            print(f"Processing: {file}")
-            resume_text = extract_text(os.path.join(resume_folder, file))
-            result = score_resume(jd_text, resume_text, client)
-            
+    resume_paths = [
+        os.path.join(resume_folder, file)
+        for file in os.listdir(resume_folder)
+        if file.lower().endswith(".pdf")
+    ]
+
+    # Extract in parallel worker processes
+    extracted = []
+    for resume_path, document, error in iter_extract_documents(resume_paths):
+        file = os.path.basename(resume_path)
+        if error:
+            print(f"Skipping {file}: {error}")
+            continue
+        extracted.append((file, document['text']))
+
+    # Cheap local pre-ranking so obvious mismatches never reach the LLM
+    prescores = prescore_resumes(jd_text, [text for _, text in extracted])
+    keep = select_for_scoring(prescores)
+    to_score = [item for item, passed in zip(extracted, keep) if passed]
+    if len(to_score) < len(extracted):
+        print(f"Pre-filter skipped {len(extracted) - len(to_score)} low-relevance resume(s)")
+
+    # Score the rest concurrently
+    with ScoringEngine() as engine:
+        for file, result in engine.score_stream(jd_text, to_score):
+            print(f"Processed: {file}")
             if result and result.get('score', 0) >= 80:
                 print(f"Match found: {result['candidate_name']} ({result['score']}%)")
                 shortlisted.append(result)
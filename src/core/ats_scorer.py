@@ -1,20 +1,46 @@
 import json
+import time
+from .score_cache import get_cached_score, set_cached_score, text_sha256
+from .compaction import compact_jd, compact_resume, RESUME_TOKEN_BUDGET, JD_TOKEN_BUDGET
+from src.utils.metrics import inc, observe, record_usage
+from src.utils.tokens import usage_from_response
 
-def score_resume(jd_text, resume_text, client):
+SCORING_MODEL = "gpt-4o-mini"
+
+# Bump whenever build_messages changes so cached scores are invalidated
+# (the token budgets are part of it, since they change what the model sees)
+PROMPT_VERSION = f"3-r{RESUME_TOKEN_BUDGET}-j{JD_TOKEN_BUDGET}"
+
+
+def build_messages(jd_text, resume_text):
     """
-    Analyzes a resume against a JD and extracts specific candidate details using LLM.
+    Builds the chat messages used to score a resume against a JD.
+    Both texts are compacted first (layout noise removed, token budgets enforced).
+
+    The instructions and the JD form the system message and the resume comes
+    last, so every call for the same JD shares an identical prompt prefix that
+    the provider can cache.
     """
-    system_message = "You are a professional ATS (Applicant Tracking System) ranking engine specialized in technical recruitment."
-    
     user_prompt = f"""
-    Evaluate the following resume against the provided Job Description. 
+    RESUME:
+    \"\"\"{compact_resume(resume_text)}\"\"\"
+    """
+
+    return [
+        {"role": "system", "content": build_system_message(jd_text)},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def build_system_message(jd_text):
+    """Instructions plus the compacted JD: the prompt prefix shared by every call for a JD."""
+    jd_text = compact_jd(jd_text)
+    return f"""You are a professional ATS (Applicant Tracking System) ranking engine specialized in technical recruitment.
+    Evaluate the resume sent by the user against the following Job Description.
     
     JOB DESCRIPTION:
     \"\"\"{jd_text}\"\"\"
     
-    RESUME:
-    \"\"\"{resume_text}\"\"\"
-    
     Instructions:
     1. Score the candidate from 0-100 based on technical skills, experience level, and certifications.
     2. If a specific field like phone or email is not found, return 'Not Provided'.
@@ -34,18 +60,150 @@ def score_resume(jd_text, resume_text, client):
     - verdict
     """
 
+
+def build_packed_messages(jd_text, resumes):
+    """
+    Builds the chat messages that score several resumes in one completion.
+
+    The system message is the same as build_messages', so packed and single
+    calls for a JD share the cached prefix.
+
+    Args:
+        jd_text: Job description text
+        resumes: List of (resume_id, resume_text)
+    """
+    blocks = "\n".join(
+        f"""
+    RESUME {resume_id}:
+    \"\"\"{compact_resume(resume_text)}\"\"\"
+    """
+        for resume_id, resume_text in resumes
+    )
+
+    user_prompt = f"""
+    Evaluate each of the following {len(resumes)} resumes independently against the Job Description.
+    {blocks}
+    Output strictly as a JSON object with a single key "results": an array with one object per
+    resume, each with a "resume_id" key (the number after RESUME) plus the EXACT keys listed above.
+    """
+
+    return [
+        {"role": "system", "content": build_system_message(jd_text)},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def completion_kwargs(jd_text, resume_text):
+    """Keyword arguments for chat.completions.create (sync or async client)."""
+    return {
+        "model": SCORING_MODEL,
+        "messages": build_messages(jd_text, resume_text),
+        "response_format": {"type": "json_object"},
+        "temperature": 0,
+        # Routes calls sharing the JD prefix to the same prompt cache
+        "prompt_cache_key": f"jd-{text_sha256(jd_text)[:16]}",
+    }
+
+
+def score_resume(jd_text, resume_text, client, use_cache=True):
+    """
+    Analyzes a resume against a JD and extracts specific candidate details using LLM.
+    Scoring runs at temperature 0, so results are cached per (JD, resume, model, prompt version).
+    Fresh results carry the call's token counts and estimated cost under 'usage';
+    cached results have none, since they cost nothing.
+    """
+    if use_cache:
+        cached = get_cached_score(jd_text, resume_text, SCORING_MODEL, PROMPT_VERSION)
+        inc("hr_score_cache_total", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
+
+    start = time.perf_counter()
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={ "type": "json_object" },
-            temperature=0
-        )
+        response = client.chat.completions.create(**completion_kwargs(jd_text, resume_text))
+        observe("hr_llm_request_seconds", time.perf_counter() - start, kind="scoring")
+        record_usage(response, "scoring")
         # Parse the JSON response from the OpenAI choice
-        return json.loads(response.choices[0].message.content)
+        result = json.loads(response.choices[0].message.content)
+    except Exception as e:
+        inc("hr_errors_total", operation="score_resume")
+        print(f"Error during AI scoring: {e}")
+        return None
+
+    if use_cache:
+        set_cached_score(jd_text, resume_text, SCORING_MODEL, PROMPT_VERSION, result)
+    return {**result, "usage": usage_from_response(response.usage, SCORING_MODEL)}
+
+
+async def score_resumes_packed_async(jd_text, resumes, client):
+    """
+    Scores several resumes against a JD in a single completion.
+
+    Nothing is cached here; the caller caches each result and falls back
+    to score_resume_async for resumes missing from the reply.
+
+    Args:
+        jd_text: Job description text
+        resumes: List of (resume_id, resume_text), ids unique within the call
+        client: openai.AsyncOpenAI
+
+    Returns:
+        (results, usage): dict of resume_id -> result, or None if the call
+        failed or the reply was not valid JSON, and the usage of the whole
+        call (None if no response was received). Results carry no 'usage';
+        the caller charges the call across the pack, fallbacks included
+    """
+    start = time.perf_counter()
+    usage = None
+    try:
+        response = await client.chat.completions.create(
+            model=SCORING_MODEL,
+            messages=build_packed_messages(jd_text, resumes),
+            response_format={"type": "json_object"},
+            temperature=0,
+            prompt_cache_key=f"jd-{text_sha256(jd_text)[:16]}"
+        )
+        observe("hr_llm_request_seconds", time.perf_counter() - start, kind="scoring_packed")
+        record_usage(response, "scoring")
+        usage = usage_from_response(response.usage, SCORING_MODEL)
+        entries = json.loads(response.choices[0].message.content)["results"]
     except Exception as e:
+        inc("hr_errors_total", operation="score_resumes_packed")
+        print(f"Error during packed AI scoring: {e}")
+        return None, usage
+
+    ids = {str(resume_id): resume_id for resume_id, _ in resumes}
+    results = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or "score" not in entry:
+            continue
+        resume_id = ids.get(str(entry.pop("resume_id", None)))
+        if resume_id is not None:
+            results[resume_id] = entry
+    return results, usage
+
+
+async def score_resume_async(jd_text, resume_text, client, use_cache=True):
+    """
+    Async variant of score_resume for use with openai.AsyncOpenAI.
+    """
+    if use_cache:
+        cached = get_cached_score(jd_text, resume_text, SCORING_MODEL, PROMPT_VERSION)
+        inc("hr_score_cache_total", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
+
+    start = time.perf_counter()
+    try:
+        response = await client.chat.completions.create(**completion_kwargs(jd_text, resume_text))
+        observe("hr_llm_request_seconds", time.perf_counter() - start, kind="scoring")
+        record_usage(response, "scoring")
+        result = json.loads(response.choices[0].message.content)
+    except Exception as e:
+        inc("hr_errors_total", operation="score_resume")
         print(f"Error during AI scoring: {e}")
-        return None
\ No newline at end of file
+        return None
+
+    if use_cache:
+        set_cached_score(jd_text, resume_text, SCORING_MODEL, PROMPT_VERSION, result)
+    return {**result, "usage": usage_from_response(response.usage, SCORING_MODEL)}
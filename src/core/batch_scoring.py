@@ -0,0 +1,101 @@
+import io
+import json
+from .ats_scorer import completion_kwargs, SCORING_MODEL
+from src.utils.tokens import usage_from_response, BATCH_PRICE_FACTOR
+
+# Terminal states reported by the OpenAI Batch API
+BATCH_DONE_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_batch_file(items):
+    """
+    Packages scoring prompts as Batch API JSONL.
+
+    Args:
+        items: Iterable of (custom_id, jd_text, resume_text)
+
+    Returns:
+        JSONL bytes, one /v1/chat/completions request per resume
+    """
+    lines = []
+    for custom_id, jd_text, resume_text in items:
+        lines.append(json.dumps({
+            "custom_id": str(custom_id),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": completion_kwargs(jd_text, resume_text),
+        }, ensure_ascii=False))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def submit_batch(client, items, metadata=None):
+    """
+    Uploads the scoring requests and creates a batch job.
+
+    Args:
+        client: Sync OpenAI client (honours OPENAI_BASE_URL for a local stand-in)
+        items: Iterable of (custom_id, jd_text, resume_text); a batch may mix JDs
+        metadata: Optional dict of string metadata attached to the batch
+
+    Returns:
+        The remote batch id
+    """
+    payload = build_batch_file(items)
+    request_count = payload.count(b"\n")
+    input_file = client.files.create(
+        file=("scoring_requests.jsonl", io.BytesIO(payload)),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+        metadata=metadata or None
+    )
+    print(f"📦 Submitted scoring batch {batch.id} ({request_count} request(s))")
+    return batch.id
+
+
+def get_batch(client, batch_id):
+    """Return the current remote batch object."""
+    return client.batches.retrieve(batch_id)
+
+
+def _read_file(client, file_id):
+    if not file_id:
+        return []
+    content = client.files.content(file_id)
+    text = content.text if hasattr(content, "text") else content.read().decode("utf-8")
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def fetch_batch_results(client, batch):
+    """
+    Downloads and parses the output of a finished batch.
+
+    Returns:
+        dict mapping custom_id -> parsed score dict (with 'usage' priced at
+        the batch discount), or None for requests that failed or returned
+        unparseable content
+    """
+    results = {}
+
+    for line in _read_file(client, getattr(batch, "output_file_id", None)):
+        custom_id = line.get("custom_id")
+        response = line.get("response") or {}
+        try:
+            if response.get("status_code") != 200:
+                raise ValueError(f"HTTP {response.get('status_code')}")
+            content = response["body"]["choices"][0]["message"]["content"]
+            results[custom_id] = {
+                **json.loads(content),
+                "usage": usage_from_response(response["body"].get("usage") or {}, SCORING_MODEL, BATCH_PRICE_FACTOR)
+            }
+        except Exception as e:
+            print(f"Error in batch result {custom_id}: {e}")
+            results[custom_id] = None
+
+    for line in _read_file(client, getattr(batch, "error_file_id", None)):
+        results.setdefault(line.get("custom_id"), None)
+
+    return results
@@ -0,0 +1,188 @@
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from src.utils.tokens import estimate_tokens
+
+# Token budgets for the resume and JD text inlined in scoring prompts (0 = no limit)
+RESUME_TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "3000"))
+JD_TOKEN_BUDGET = int(os.getenv("JD_TOKEN_BUDGET", "1500"))
+
+# Separates pages in extracted text (written by pdf_reader)
+PAGE_BREAK = "\f"
+
+# Lines this close to the top/bottom of a page are header/footer candidates
+EDGE_LINES = 3
+
+TRUNCATION_MARK = "[...]"
+
+PAGE_NUMBER_RE = re.compile(r"^(page\s*)?[-–(\[]?\s*\d{1,3}\s*((of|/)\s*\d{1,3})?\s*[-–)\]]?$", re.IGNORECASE)
+DECORATION_RE = re.compile(r"^[\s\-–—_=*•·.|~]+$")
+
+# Section headings, by how much of the budget they deserve (higher is kept first).
+# Priority 0 sections are dropped whenever the text is over budget.
+SECTION_PRIORITIES = [
+    (5, ("experience", "work experience", "professional experience", "work history", "employment", "employment history", "career history")),
+    (4, ("skills", "technical skills", "core skills", "key skills", "competencies", "core competencies", "technologies", "tools")),
+    (3, ("summary", "professional summary", "profile", "objective", "career objective", "about me")),
+    (3, ("projects", "key projects", "certifications", "certificates", "licenses")),
+    (2, ("education", "academic", "qualifications", "academic qualifications", "training", "courses")),
+    (1, ("achievements", "awards", "publications", "languages", "volunteer", "activities")),
+    (0, ("references", "referees", "hobbies", "interests", "personal details", "personal information", "declaration")),
+]
+SECTION_HEADINGS = {heading: priority for priority, headings in SECTION_PRIORITIES for heading in headings}
+
+# Text before the first heading: name and contact details
+HEADER_PRIORITY = 6
+
+
+def _line_key(line):
+    """Comparable form of a line for header/footer detection (digits ignored)."""
+    return re.sub(r"\d+", "#", line.lower()).strip()
+
+
+def strip_repeated_lines(pages):
+    """
+    Remove headers and footers repeated across pages.
+
+    A line near the top or bottom of a page counts as a header/footer when
+    the same line (ignoring digits, e.g. page numbers) appears near the edge
+    of more than half of the pages. The first page keeps its copy, since a
+    resume's running header is usually the candidate's name.
+
+    Args:
+        pages: List of page texts
+
+    Returns:
+        List of page texts without the repeated lines
+    """
+    if len(pages) < 2:
+        return pages
+
+    page_lines = [page.split("\n") for page in pages]
+    seen = Counter()
+    for lines in page_lines:
+        edges = [line for line in lines if line.strip()]
+        seen.update({_line_key(line) for line in edges[:EDGE_LINES] + edges[-EDGE_LINES:]})
+    repeated = {key for key, count in seen.items() if key and count > len(pages) / 2}
+
+    if not repeated:
+        return pages
+    return pages[:1] + [
+        "\n".join(line for line in lines if _line_key(line) not in repeated) for lines in page_lines[1:]
+    ]
+
+
+def normalize_text(text):
+    """
+    Collapse the layout noise of extracted PDF text.
+
+    Strips repeated headers/footers across pages, page numbers and
+    decoration lines, squeezes runs of spaces and tabs, and leaves at most
+    one blank line between paragraphs.
+    """
+    pages = strip_repeated_lines((text or "").split(PAGE_BREAK))
+
+    lines = []
+    for line in "\n".join(pages).split("\n"):
+        line = re.sub(r"[ \t\u00a0]+", " ", line).strip()
+        if line and (PAGE_NUMBER_RE.match(line) or DECORATION_RE.match(line)):
+            continue
+        if not line and (not lines or not lines[-1]):
+            continue
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def _heading_priority(line):
+    """Priority of a section heading line, or None if the line is not a heading."""
+    if len(line) > 40:
+        return None
+    key = re.sub(r"[^a-z ]", "", line.lower()).strip()
+    return SECTION_HEADINGS.get(key)
+
+
+def split_sections(text):
+    """
+    Split resume text into sections at known headings.
+
+    Returns:
+        List of (priority, text) in document order; the text before the
+        first heading is kept as the highest-priority header section
+    """
+    sections = [[HEADER_PRIORITY, []]]
+    for line in text.split("\n"):
+        priority = _heading_priority(line)
+        if priority is not None:
+            sections.append([priority, []])
+        sections[-1][1].append(line)
+    return [(priority, "\n".join(lines).strip()) for priority, lines in sections if any(lines)]
+
+
+def _truncate(text, budget):
+    """
+    Cut text at a line boundary so it fits in budget tokens.
+
+    The line that overflows is cut at a word boundary within what is left of
+    the budget, so a section written as one long line keeps its start; some
+    text is kept even when the budget is too small for any.
+    """
+    kept = []
+    used = estimate_tokens(TRUNCATION_MARK)
+    for line in text.split("\n"):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            # ~4 characters per token, as in estimate_tokens
+            chars = max(budget - used - 2, 1) * 4
+            cut = line.strip()[:chars]
+            if " " in cut[chars // 2:]:
+                cut = cut[:cut.rindex(" ")]
+            kept.append(cut)
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept + [TRUNCATION_MARK]).strip()
+
+
+def fit_to_budget(text, budget):
+    """
+    Section-aware truncation of resume text to a token budget.
+
+    Sections in priority 0 (references, hobbies, ...) go first; the rest of
+    the budget is handed out by priority, so contact details, experience
+    and skills survive while education and extras are shortened or dropped.
+    Sections keep their original order.
+    """
+    if not budget or estimate_tokens(text) <= budget:
+        return text
+
+    sections = [(priority, section) for priority, section in split_sections(text) if priority > 0]
+    remaining = budget
+    kept = {}
+    for index in sorted(range(len(sections)), key=lambda i: -sections[i][0]):
+        section = sections[index][1]
+        cost = estimate_tokens(section) + 1
+        if cost <= remaining:
+            kept[index] = section
+            remaining -= cost
+        elif remaining > 0:
+            section = _truncate(section, remaining)
+            if section:
+                kept[index] = section
+                remaining -= estimate_tokens(section) + 1
+    return "\n\n".join(kept[index] for index in sorted(kept))
+
+
+@lru_cache(maxsize=512)
+def compact_resume(text):
+    """Normalized resume text within RESUME_TOKEN_BUDGET."""
+    return fit_to_budget(normalize_text(text), RESUME_TOKEN_BUDGET)
+
+
+@lru_cache(maxsize=64)
+def compact_jd(text):
+    """Normalized JD text within JD_TOKEN_BUDGET (plain truncation: a JD has no droppable sections)."""
+    text = normalize_text(text)
+    if JD_TOKEN_BUDGET and estimate_tokens(text) > JD_TOKEN_BUDGET:
+        text = _truncate(text, JD_TOKEN_BUDGET)
+    return text
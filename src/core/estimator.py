@@ -0,0 +1,168 @@
+import os
+from .ats_scorer import build_messages, SCORING_MODEL
+from .compaction import compact_resume, RESUME_TOKEN_BUDGET
+from .scoring_engine import SCORING_CONCURRENCY, OPENAI_RPM, OPENAI_TPM, EXPECTED_COMPLETION_TOKENS
+from src.extractor.pdf_reader import OCR_CONCURRENCY, OCR_PAGE_TOKENS
+from src.extractor.batch_reader import EXTRACTION_WORKERS
+from src.extractor.vision_ocr import OCR_MODEL
+from src.extractor.ocr_backends import get_backends
+from src.utils.metrics import observed_mean, observed_count, observed_value
+from src.utils.tokens import estimate_tokens, estimate_message_tokens, estimate_cost, BATCH_PRICE_FACTOR
+
+# Vision OCR of one full, uncropped page at detail=high (short side 768px): image tiles
+# plus the instruction. Replaced by the observed average once OCR calls have been recorded,
+# which reflects cropping and detail=low pages.
+OCR_PROMPT_TOKENS_PER_PAGE = 850
+# Text returned for a typical resume page; also stands in for that page in the scoring prompt
+OCR_COMPLETION_TOKENS_PER_PAGE = OCR_PAGE_TOKENS
+
+# Share of pages a local OCR tier passes on to the next one, until real outcomes
+# have been recorded in the metrics store
+DEFAULT_OCR_FALLBACK_RATE = float(os.getenv("ESTIMATE_OCR_FALLBACK_RATE", "0.3"))
+
+# Latency assumptions (seconds) used until real timings have been recorded in the metrics store
+DEFAULT_SCORING_SECONDS = float(os.getenv("ESTIMATE_SCORING_SECONDS", "6"))
+DEFAULT_OCR_SECONDS = float(os.getenv("ESTIMATE_OCR_SECONDS", "10"))
+DEFAULT_LOCAL_OCR_SECONDS = float(os.getenv("ESTIMATE_LOCAL_OCR_SECONDS", "2"))
+DEFAULT_TEXT_PAGE_SECONDS = 0.02
+
+
+def ocr_profile():
+    """
+    How an OCR page is expected to be read under the configured OCR_BACKENDS.
+
+    The share of pages reaching each tier comes from the recorded
+    hr_ocr_pages_by_backend_total outcomes (DEFAULT_OCR_FALLBACK_RATE per
+    local tier until there are any); Vision tokens per call and latencies
+    are the recorded averages, or the module defaults.
+
+    Returns:
+        dict with 'vision_share' (expected Vision calls per OCR page),
+        'prompt_tokens' and 'completion_tokens' (per Vision call) and
+        'seconds' (expected OCR wall-clock per page)
+    """
+    def attempts(name):
+        return sum(
+            observed_value("hr_ocr_pages_by_backend_total", backend=name, outcome=outcome)
+            for outcome in ("accepted", "fallback")
+        )
+
+    backends = get_backends()
+    first_attempts = attempts(backends[0].name)
+    reach = 1.0
+    vision_share = 0.0
+    seconds = 0.0
+    for index, backend in enumerate(backends):
+        if index and first_attempts:
+            reach = min(attempts(backend.name) / first_attempts, 1.0)
+        elif index:
+            reach *= DEFAULT_OCR_FALLBACK_RATE
+        default_seconds = DEFAULT_LOCAL_OCR_SECONDS if backend.local else DEFAULT_OCR_SECONDS
+        seconds += reach * (observed_mean("hr_ocr_backend_seconds", backend=backend.name) or default_seconds)
+        if backend.name == "vision":
+            vision_share = reach
+
+    calls = observed_count("hr_llm_request_seconds", kind="ocr")
+    return {
+        "vision_share": vision_share,
+        "prompt_tokens": observed_value("hr_llm_tokens_total", kind="ocr", type="prompt") / calls if calls else OCR_PROMPT_TOKENS_PER_PAGE,
+        "completion_tokens": observed_value("hr_llm_tokens_total", kind="ocr", type="completion") / calls if calls else OCR_COMPLETION_TOKENS_PER_PAGE,
+        "seconds": seconds,
+    }
+
+
+def estimate_run(documents, pairs, jd_texts, batch=False):
+    """
+    Predicts the OpenAI calls, tokens, cost and wall-clock of an analysis run.
+
+    Only local work is involved: page classification and text come from
+    pdf_reader.inspect_document, prompt tokens are counted locally from the
+    score_resume prompt, and latencies are the averages recorded by the
+    metrics store (or the DEFAULT_* assumptions when nothing was recorded).
+    OCR pages are priced through the configured OCR backends: only the
+    expected share that reaches Vision is charged (see ocr_profile).
+
+    Args:
+        documents: dict of key -> inspect_document() result for every resume that will be extracted
+        pairs: Iterable of (document key, jd_id) that will be sent to the LLM for scoring
+        jd_texts: dict of jd_id -> JD text
+        batch: Score through the OpenAI Batch API (discounted, no wall-clock estimate)
+
+    Returns:
+        dict with page counts, predicted LLM calls, tokens, estimated cost (USD)
+        and estimated seconds per stage
+    """
+    ocr_pages = sum(document["ocr_pages"] for document in documents.values())
+    text_pages = sum(document["pages"] - document["ocr_pages"] for document in documents.values())
+
+    ocr = ocr_profile()
+    vision_calls = ocr_pages * ocr["vision_share"]
+    ocr_prompt_tokens = round(vision_calls * ocr["prompt_tokens"])
+    ocr_completion_tokens = round(vision_calls * ocr["completion_tokens"])
+
+    scoring_calls = 0
+    scoring_prompt_tokens = 0
+    for key, jd_id in pairs:
+        document = documents[key]
+        scoring_calls += 1
+        scoring_prompt_tokens += estimate_message_tokens(build_messages(jd_texts[jd_id], document["text"]))
+        # Text still to come from OCR, within whatever the resume token budget leaves
+        ocr_tokens = document["ocr_pages"] * OCR_COMPLETION_TOKENS_PER_PAGE
+        if RESUME_TOKEN_BUDGET:
+            ocr_tokens = min(ocr_tokens, max(0, RESUME_TOKEN_BUDGET - estimate_tokens(compact_resume(document["text"]))))
+        scoring_prompt_tokens += ocr_tokens
+    scoring_completion_tokens = scoring_calls * EXPECTED_COMPLETION_TOKENS
+
+    ocr_cost = estimate_cost(OCR_MODEL, ocr_prompt_tokens, ocr_completion_tokens)
+    scoring_cost = estimate_cost(
+        SCORING_MODEL, scoring_prompt_tokens, scoring_completion_tokens,
+        BATCH_PRICE_FACTOR if batch else 1.0
+    )
+
+    scoring_seconds = observed_mean("hr_llm_request_seconds", kind="scoring") or DEFAULT_SCORING_SECONDS
+    ocr_seconds = ocr["seconds"]
+
+    # Extraction: files spread over the process pool, OCR pages over each file's thread pool
+    workers = min(EXTRACTION_WORKERS, len(documents)) or 1
+    extraction = (text_pages * DEFAULT_TEXT_PAGE_SECONDS + ocr_pages * ocr_seconds / OCR_CONCURRENCY) / workers
+
+    # Scoring: bounded by concurrency and by the account's request/token limits
+    scoring = None
+    if not batch:
+        limits = [scoring_calls * scoring_seconds / SCORING_CONCURRENCY]
+        if OPENAI_RPM:
+            limits.append(scoring_calls / OPENAI_RPM * 60)
+        if OPENAI_TPM:
+            limits.append((scoring_prompt_tokens + scoring_completion_tokens) / OPENAI_TPM * 60)
+        scoring = max(limits)
+
+    return {
+        "resumes": len(documents),
+        "pages": {"total": text_pages + ocr_pages, "text": text_pages, "ocr": ocr_pages},
+        "llm_calls": {"ocr": round(vision_calls), "scoring": scoring_calls},
+        "tokens": {
+            "prompt": ocr_prompt_tokens + scoring_prompt_tokens,
+            "completion": ocr_completion_tokens + scoring_completion_tokens,
+            "ocr": ocr_prompt_tokens + ocr_completion_tokens,
+            "scoring": scoring_prompt_tokens + scoring_completion_tokens,
+        },
+        "estimated_cost": round(ocr_cost + scoring_cost, 4),
+        "cost": {"ocr": round(ocr_cost, 4), "scoring": round(scoring_cost, 4)},
+        "estimated_seconds": {
+            "extraction": round(extraction, 1),
+            "scoring": None if scoring is None else round(scoring, 1),
+            "total": None if scoring is None else round(extraction + scoring, 1),
+        },
+        "assumptions": {
+            "scoring_seconds_per_call": round(scoring_seconds, 2),
+            "ocr_seconds_per_page": round(ocr_seconds, 2),
+            "ocr_backends": [backend.name for backend in get_backends()],
+            "vision_calls_per_ocr_page": round(ocr["vision_share"], 2),
+            "vision_prompt_tokens_per_call": round(ocr["prompt_tokens"]),
+            "extraction_workers": workers,
+            "ocr_concurrency": OCR_CONCURRENCY,
+            "scoring_concurrency": SCORING_CONCURRENCY,
+            "openai_rpm": OPENAI_RPM,
+            "openai_tpm": OPENAI_TPM,
+        },
+    }
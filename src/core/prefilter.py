@@ -0,0 +1,116 @@
+import os
+import re
+import numpy as np
+
+# Default pre-filter settings (0 disables the respective rule)
+PREFILTER_MIN_SCORE = float(os.getenv("PREFILTER_MIN_SCORE", "0"))
+PREFILTER_TOP_N = int(os.getenv("PREFILTER_TOP_N", "0"))
+
+# Keeps tech tokens like c++, c#, node.js, .net intact
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = frozenset("""
+a an and are as at be been by for from has have in is it its of on or our that the their this to
+was we were will with you your i me my he she they them his her us not but if so than then there
+these those who whom which what when where how all any both each few more most other some such
+no nor only own same too very can just should now also etc per via within across into over under
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords and single characters removed."""
+    return [
+        token
+        for token in TOKEN_RE.findall((text or "").lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def prescore_resumes(jd_text, resume_texts):
+    """
+    Quick local relevance of each resume to the JD, without any LLM call.
+
+    Builds a TF-IDF model over the JD and all resumes in the batch and
+    combines cosine similarity to the JD with IDF-weighted coverage of the
+    JD's terms. Everything after tokenization is vectorized with NumPy.
+
+    Args:
+        jd_text: Job description text
+        resume_texts: List of resume texts
+
+    Returns:
+        NumPy array of scores in [0, 100], one per resume
+    """
+    if not resume_texts:
+        return np.zeros(0)
+
+    docs = [tokenize(jd_text)] + [tokenize(text) for text in resume_texts]
+    vocab = {}
+    doc_ids = []
+    term_ids = []
+    for doc_id, tokens in enumerate(docs):
+        for token in tokens:
+            term_ids.append(vocab.setdefault(token, len(vocab)))
+        doc_ids.extend([doc_id] * len(tokens))
+
+    if not vocab or not docs[0]:
+        return np.zeros(len(resume_texts))
+
+    n_docs = len(docs)
+    n_terms = len(vocab)
+
+    # Term counts per (doc, term) pair
+    pairs, counts = np.unique(
+        np.asarray(doc_ids, dtype=np.int64) * n_terms + np.asarray(term_ids, dtype=np.int64),
+        return_counts=True
+    )
+    pair_docs = pairs // n_terms
+    pair_terms = pairs % n_terms
+
+    # Smoothed IDF and sublinear TF
+    df = np.bincount(pair_terms, minlength=n_terms)
+    idf = np.log((1 + n_docs) / (1 + df)) + 1
+    weights = (1 + np.log(counts)) * idf[pair_terms]
+
+    norms = np.sqrt(np.bincount(pair_docs, weights=weights ** 2, minlength=n_docs))
+
+    jd_mask = pair_docs == 0
+    jd_vector = np.zeros(n_terms)
+    jd_vector[pair_terms[jd_mask]] = weights[jd_mask]
+
+    dots = np.bincount(pair_docs, weights=weights * jd_vector[pair_terms], minlength=n_docs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cosine = np.nan_to_num(dots / (norms * norms[0]))
+
+    # Share of the JD's (IDF-weighted) vocabulary that appears in each resume
+    jd_terms = jd_vector > 0
+    present = jd_terms[pair_terms]
+    coverage = np.bincount(pair_docs[present], weights=idf[pair_terms[present]], minlength=n_docs)
+    coverage = coverage / idf[jd_terms].sum()
+
+    scores = 100 * (0.5 * cosine + 0.5 * coverage)
+    return np.clip(scores[1:], 0, 100).round(2)
+
+
+def select_for_scoring(prescores, min_score=None, top_n=None):
+    """
+    Decide which resumes go on to LLM scoring.
+
+    Args:
+        prescores: Array from prescore_resumes
+        min_score: Minimum pre-score to keep (defaults to PREFILTER_MIN_SCORE)
+        top_n: Keep at most this many best pre-scores (defaults to PREFILTER_TOP_N)
+
+    Returns:
+        Boolean NumPy mask aligned with prescores
+    """
+    prescores = np.asarray(prescores, dtype=float)
+    min_score = PREFILTER_MIN_SCORE if min_score is None else float(min_score)
+    top_n = PREFILTER_TOP_N if top_n is None else int(top_n)
+
+    keep = prescores >= min_score
+    if top_n and keep.sum() > top_n:
+        ranked = np.argsort(-np.where(keep, prescores, -np.inf), kind="stable")
+        keep = np.zeros_like(keep)
+        keep[ranked[:top_n]] = True
+    return keep
@@ -0,0 +1,80 @@
+import hashlib
+import os
+from src.utils.disk_cache import DiskCache
+
+# Cached scores expire after this many days (0 = never)
+SCORE_CACHE_TTL_DAYS = float(os.getenv("SCORE_CACHE_TTL_DAYS", "30"))
+
+score_cache = DiskCache("scores", ttl=SCORE_CACHE_TTL_DAYS * 86400 or None)
+
+_checked_version = None
+
+
+def text_sha256(text):
+    """Return the SHA-256 hex digest of a text string."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def score_cache_key(jd_text, resume_text, model, prompt_version):
+    return f"{prompt_version}:{model}:{text_sha256(jd_text)}:{text_sha256(resume_text)}"
+
+
+def _ensure_prompt_version(prompt_version):
+    """Drop every cached score once the prompt template version changes."""
+    global _checked_version
+    if _checked_version == prompt_version:
+        return
+
+    stored = score_cache.get_meta("prompt_version")
+    if stored != prompt_version:
+        if stored is not None:
+            print(f"♻️  Scoring prompt changed ({stored} -> {prompt_version}); clearing score cache")
+        score_cache.clear()
+        score_cache.set_meta("prompt_version", prompt_version)
+    _checked_version = prompt_version
+
+
+def get_cached_score(jd_text, resume_text, model, prompt_version):
+    """Return a previously computed score result, or None."""
+    _ensure_prompt_version(prompt_version)
+    return score_cache.get(score_cache_key(jd_text, resume_text, model, prompt_version))
+
+
+def set_cached_score(jd_text, resume_text, model, prompt_version, result):
+    """Store a score result (failed/None results are never cached, nor is the call's usage)."""
+    if result is None:
+        return
+    result = {key: value for key, value in result.items() if key != "usage"}
+    score_cache.set(score_cache_key(jd_text, resume_text, model, prompt_version), result)
+
+
+def invalidate_scores(jd_text=None):
+    """
+    Explicitly invalidate cached scores.
+
+    Args:
+        jd_text: If given, only scores for this JD are dropped; otherwise all.
+
+    Returns:
+        Number of entries removed (None when the whole cache was cleared)
+    """
+    global _checked_version
+    if jd_text is None:
+        score_cache.clear()
+        _checked_version = None
+        return None
+
+    removed = 0
+    jd_hash = text_sha256(jd_text)
+    # Keys are "<prompt_version>:<model>:<jd_hash>:<resume_hash>"
+    for key in score_cache.keys():
+        parts = key.split(":")
+        if len(parts) == 4 and parts[2] == jd_hash:
+            score_cache.delete(key)
+            removed += 1
+    return removed
+
+
+def score_cache_stats():
+    """Return hit/miss/size counters for the score cache."""
+    return score_cache.stats()
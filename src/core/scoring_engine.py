@@ -0,0 +1,337 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import deque
+from openai import AsyncOpenAI
+from dotenv import load_dotenv
+from .ats_scorer import (
+    build_messages, build_packed_messages, score_resume_async, score_resumes_packed_async, SCORING_MODEL, PROMPT_VERSION
+)
+from .compaction import compact_resume
+from .score_cache import get_cached_score, set_cached_score
+from src.utils.tokens import add_usage, estimate_tokens, estimate_message_tokens
+from src.utils.metrics import inc, observe
+
+load_dotenv()
+
+# Concurrency and OpenAI account limits for batch scoring (0 = no limit)
+SCORING_CONCURRENCY = max(1, int(os.getenv("SCORING_CONCURRENCY", "8")))
+OPENAI_RPM = int(os.getenv("OPENAI_RPM", "0"))
+OPENAI_TPM = int(os.getenv("OPENAI_TPM", "0"))
+
+# Completion tokens reserved per request when checking the TPM budget
+EXPECTED_COMPLETION_TOKENS = 400
+
+# Packed mode: score up to PACKED_SCORING_SIZE short resumes per completion (0/1 = off).
+# Only resumes of at most PACKED_RESUME_MAX_TOKENS are packed, a packed prompt (system
+# prompt and JD included) stays within PACKED_PROMPT_TOKEN_BUDGET, and a partly filled
+# pack is sent after PACK_LINGER_SECONDS.
+PACKED_SCORING_SIZE = int(os.getenv("PACKED_SCORING_SIZE", "0"))
+PACKED_RESUME_MAX_TOKENS = int(os.getenv("PACKED_RESUME_MAX_TOKENS", "800"))
+PACKED_PROMPT_TOKEN_BUDGET = int(os.getenv("PACKED_PROMPT_TOKEN_BUDGET", "6000"))
+PACK_LINGER_SECONDS = float(os.getenv("PACK_LINGER_SECONDS", "0.2"))
+
+
+class RateLimiter:
+    """
+    Sliding one-minute window limiter for requests and tokens per minute.
+    Must be used from a single event loop.
+    """
+
+    def __init__(self, rpm=0, tpm=0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._events = deque()  # (timestamp, tokens) per request in the last minute
+        self._tokens = 0
+
+    def _expire(self, now):
+        while self._events and now - self._events[0][0] >= 60:
+            _, tokens = self._events.popleft()
+            self._tokens -= tokens
+
+    async def acquire(self, tokens):
+        """
+        Wait until a request of the given token size fits in both budgets.
+        """
+        while True:
+            now = time.monotonic()
+            self._expire(now)
+
+            rpm_ok = not self.rpm or len(self._events) < self.rpm
+            # A single oversized request is still allowed through on an empty window
+            tpm_ok = not self.tpm or self._tokens + tokens <= self.tpm or not self._events
+
+            if rpm_ok and tpm_ok:
+                self._events.append((now, tokens))
+                self._tokens += tokens
+                return
+
+            await asyncio.sleep(max(0.05, 60 - (now - self._events[0][0])))
+
+
+class ScoringEngine:
+    """
+    Scores resumes concurrently with the async OpenAI client.
+
+    The engine runs its own event loop on a background thread, so it can be
+    driven from synchronous code (Django views, main.py) as well as awaited
+    directly. Concurrency is bounded by a semaphore and requests are paced by
+    a requests/tokens-per-minute limiter.
+
+    In packed mode (pack_size > 1) short resumes for the same JD are grouped
+    and scored several per completion, trading a little accuracy for far
+    fewer requests under tight RPM limits. Resumes missing from a packed
+    reply, or whose pack failed, are scored one by one.
+
+    Point OPENAI_BASE_URL at a local fake completion server to test it offline.
+
+    Usage:
+        with ScoringEngine() as engine:
+            for key, result in engine.score_stream(jd_text, items):
+                ...
+    """
+
+    def __init__(self, client=None, concurrency=None, rpm=None, tpm=None, pack_size=None):
+        self.client = client
+        self.concurrency = concurrency or SCORING_CONCURRENCY
+        self.rpm = OPENAI_RPM if rpm is None else rpm
+        self.tpm = OPENAI_TPM if tpm is None else tpm
+        self.pack_size = PACKED_SCORING_SIZE if pack_size is None else int(pack_size)
+        self._packs = {}  # jd_text -> [(resume_text, tokens, future)] waiting to be sent
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._limiter = None
+        self._owns_client = False
+
+    # -- lifecycle -----------------------------------------------------
+
+    def start(self):
+        if self._loop is not None:
+            return self
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._setup()
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="scoring-engine", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def close(self):
+        if self._loop is None:
+            return
+        if self.client is not None and self._owns_client:
+            asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _setup(self):
+        """Create loop-bound primitives (called inside the engine's loop)."""
+        self._owns_client = self.client is None
+        if self.client is None:
+            self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._limiter = RateLimiter(self.rpm, self.tpm)
+
+    # -- scoring -------------------------------------------------------
+
+    async def score(self, jd_text, resume_text):
+        """Score one resume, respecting the concurrency and rate limits."""
+        if self._semaphore is None:
+            self._setup()
+
+        # Cache hits skip the concurrency slot and the rate limiter entirely
+        cached = get_cached_score(jd_text, resume_text, SCORING_MODEL, PROMPT_VERSION)
+        inc("hr_score_cache_total", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
+
+        if self.pack_size > 1:
+            resume_tokens = estimate_tokens(compact_resume(resume_text))
+            if resume_tokens <= PACKED_RESUME_MAX_TOKENS:
+                return await self._score_packed(jd_text, resume_text, resume_tokens)
+
+        return await self._score_single(jd_text, resume_text)
+
+    async def _request_slot(self, tokens):
+        """Wait for the rate limiter (call while holding the semaphore)."""
+        waited = time.monotonic()
+        await self._limiter.acquire(tokens)
+        observe("hr_rate_limit_wait_seconds", time.monotonic() - waited)
+
+    async def _score_single(self, jd_text, resume_text):
+        tokens = estimate_message_tokens(build_messages(jd_text, resume_text)) + EXPECTED_COMPLETION_TOKENS
+        async with self._semaphore:
+            await self._request_slot(tokens)
+            result = await score_resume_async(jd_text, resume_text, self.client, use_cache=False)
+
+        set_cached_score(jd_text, resume_text, SCORING_MODEL, PROMPT_VERSION, result)
+        return result
+
+    # -- packed mode ---------------------------------------------------
+
+    async def _score_packed(self, jd_text, resume_text, resume_tokens):
+        """Add a resume to its JD's open pack and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        pack = self._packs.get(jd_text)
+        if pack and (
+            estimate_message_tokens(build_packed_messages(jd_text, []))
+            + sum(tokens for _, tokens, _ in pack) + resume_tokens > PACKED_PROMPT_TOKEN_BUDGET
+        ):
+            self._send_pack(jd_text)
+            pack = None
+
+        if not pack:
+            pack = self._packs[jd_text] = []
+            asyncio.get_running_loop().call_later(PACK_LINGER_SECONDS, self._send_pack, jd_text, pack)
+        pack.append((resume_text, resume_tokens, future))
+
+        if len(pack) >= self.pack_size:
+            self._send_pack(jd_text)
+        return await future
+
+    def _send_pack(self, jd_text, pack=None):
+        """Close the JD's open pack (if it is still pack) and score it."""
+        if pack is not None and self._packs.get(jd_text) is not pack:
+            return
+        pack = self._packs.pop(jd_text, None)
+        if pack:
+            asyncio.ensure_future(self._run_pack(jd_text, pack))
+
+    async def _run_pack(self, jd_text, pack):
+        """
+        Score a closed pack in one call, falling back to single calls for
+        resumes missing from the reply.
+
+        The packed call's usage is split evenly across the pack and added to
+        each resume's result, fallbacks included; shares of resumes left
+        without a result go to the first one that has one, so the tokens
+        spent on the pack are always charged.
+        """
+        try:
+            results, usage = {}, None
+            if len(pack) > 1:
+                resumes = [(index + 1, resume_text) for index, (resume_text, _, _) in enumerate(pack)]
+                tokens = estimate_message_tokens(build_packed_messages(jd_text, resumes)) + EXPECTED_COMPLETION_TOKENS * len(pack)
+                async with self._semaphore:
+                    await self._request_slot(tokens)
+                    results, usage = await score_resumes_packed_async(jd_text, resumes, self.client)
+                results = results or {}
+
+            outcomes = [results.get(index + 1) for index in range(len(pack))]
+            for (resume_text, _, _), result in zip(pack, outcomes):
+                if result is not None:
+                    set_cached_score(jd_text, resume_text, SCORING_MODEL, PROMPT_VERSION, result)
+
+            fallbacks = [index for index, result in enumerate(outcomes) if result is None]
+            if fallbacks and len(pack) > 1:
+                inc("hr_retries_total", len(fallbacks), operation="packed_fallback")
+            singles = await asyncio.gather(
+                *(self._score_single(jd_text, pack[index][0]) for index in fallbacks),
+                return_exceptions=True
+            )
+            for index, outcome in zip(fallbacks, singles):
+                outcomes[index] = outcome
+
+            if usage:
+                charged = [index for index, outcome in enumerate(outcomes) if isinstance(outcome, dict)]
+                for index in charged:
+                    if index == charged[0]:
+                        # Whatever the other shares don't cover, so token counts add up exactly
+                        share = {
+                            key: value - (len(charged) - 1) * (value // len(pack)) if key != "cost"
+                            else value * (len(pack) - len(charged) + 1) / len(pack)
+                            for key, value in usage.items()
+                        }
+                    else:
+                        share = {key: value // len(pack) if key != "cost" else value / len(pack) for key, value in usage.items()}
+                    outcomes[index] = {**outcomes[index], "usage": add_usage(share, outcomes[index].get("usage"))}
+
+            for (_, _, future), outcome in zip(pack, outcomes):
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+        except Exception as e:
+            for _, _, future in pack:
+                if not future.done():
+                    future.set_exception(e)
+
+    def submit(self, jd_text, resume_text):
+        """Schedule scoring from synchronous code. Returns a concurrent.futures.Future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self.score(jd_text, resume_text), self._loop)
+
+    async def score_many(self, jd_text, items, ordered=False):
+        """
+        Async generator scoring (key, resume_text) pairs.
+
+        Yields (key, result) in input order if ordered is True, otherwise as
+        each score completes.
+        """
+        async def keyed(key, text):
+            return key, await self.score(jd_text, text)
+
+        tasks = [asyncio.ensure_future(keyed(key, text)) for key, text in items]
+
+        for task in (tasks if ordered else asyncio.as_completed(tasks)):
+            yield await task
+
+    def score_stream(self, jd_text, items):
+        """
+        Score (key, resume_text) pairs from synchronous code, yielding (key, result)
+        as each completes. items may be a lazy iterator (e.g. text extraction
+        results); scoring starts as soon as each item is produced.
+        """
+        return self.score_pairs_stream((key, jd_text, text) for key, text in items)
+
+    def score_pairs_stream(self, items):
+        """
+        Like score_stream, but each item carries its own JD:
+        (key, jd_text, resume_text). Used to fan one resume out to several JDs.
+        """
+        finished = queue.Queue()
+        outstanding = 0
+
+        def drain(block):
+            nonlocal outstanding
+            while outstanding and (block or not finished.empty()):
+                key, future = finished.get()
+                outstanding -= 1
+                try:
+                    yield key, future.result()
+                except Exception as e:
+                    print(f"Error during AI scoring: {e}")
+                    yield key, None
+
+        for key, jd_text, text in items:
+            future = self.submit(jd_text, text)
+            future.add_done_callback(lambda f, key=key: finished.put((key, f)))
+            outstanding += 1
+            yield from drain(block=False)
+
+        yield from drain(block=True)
+
+    def score_all(self, jd_text, items, ordered=True):
+        """Score (key, resume_text) pairs and return a list of (key, result)."""
+        if ordered:
+            futures = [(key, self.submit(jd_text, text)) for key, text in items]
+            return [(key, future.result()) for key, future in futures]
+        return list(self.score_stream(jd_text, items))
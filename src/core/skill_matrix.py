@@ -0,0 +1,208 @@
+import ast
+import os
+import re
+import numpy as np
+from src.utils.disk_cache import CACHE_DIR
+
+# Where the candidates x skills matrix is persisted between processes and restarts
+SKILL_MATRIX_PATH = os.path.join(CACHE_DIR, "skill_matrix.npz")
+
+# Spellings the LLM uses for the same skill
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "reactjs": "react",
+    "react.js": "react",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "nextjs": "next.js",
+    "golang": "go",
+    "py": "python",
+    "python3": "python",
+    "postgres": "postgresql",
+    "k8s": "kubernetes",
+    "amazon web services": "aws",
+    "google cloud": "gcp",
+    "google cloud platform": "gcp",
+    "ms excel": "excel",
+    "microsoft excel": "excel",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "ci/cd": "cicd",
+    "ci cd": "cicd",
+}
+
+SPLIT_RE = re.compile(r"[,;\n•|]+")
+
+
+def normalize_skill(skill):
+    """Canonical vocabulary form of one skill name ('' if it is not usable)."""
+    skill = re.sub(r"\s+", " ", str(skill).strip().strip("-*.()[]'\"").lower())
+    skill = re.sub(r"\s*\(.*?\)$", "", skill)  # "python (advanced)" -> "python"
+    if not skill or len(skill) > 60:
+        return ""
+    return SKILL_ALIASES.get(skill, skill)
+
+
+def parse_skills(value):
+    """
+    Normalized, de-duplicated skills from an LLM skills field.
+
+    Accepts a list, a stored list repr ("['Python', 'Django']") or free text
+    separated by commas, semicolons, bullets or new lines.
+    """
+    if not value:
+        return []
+    if isinstance(value, str) and value.lstrip().startswith("["):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            pass
+    parts = value if isinstance(value, (list, tuple)) else SPLIT_RE.split(str(value))
+
+    skills = []
+    for part in parts:
+        skill = normalize_skill(part)
+        if skill and skill not in skills:
+            skills.append(skill)
+    return skills
+
+
+class SkillMatrix:
+    """
+    Candidates x skills presence matrix in compressed sparse row form.
+
+    Row i lists the vocabulary ids of the skills candidate_ids[i] matched
+    (indices[indptr[i]:indptr[i + 1]]), so scoring an arbitrary weighted
+    skill vector is a gather plus a segmented sum over all candidates.
+
+    Args:
+        vocab: List of skill names (column order)
+        candidate_ids: Array of Candidate ids (row order)
+        indptr: Row offsets into indices (len(candidate_ids) + 1)
+        indices: Skill ids of every row, concatenated
+        fingerprint: Tag of the data the matrix was built from, to detect staleness
+    """
+
+    def __init__(self, vocab, candidate_ids, indptr, indices, fingerprint=""):
+        self.vocab = list(vocab)
+        self.index = {skill: i for i, skill in enumerate(self.vocab)}
+        self.candidate_ids = np.asarray(candidate_ids, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, rows, fingerprint=""):
+        """
+        Build from (candidate_id, skills) rows, skills as accepted by parse_skills.
+        """
+        index = {}
+        candidate_ids = []
+        indptr = [0]
+        indices = []
+        for candidate_id, skills in rows:
+            ids = sorted({index.setdefault(skill, len(index)) for skill in parse_skills(skills)})
+            candidate_ids.append(candidate_id)
+            indices.extend(ids)
+            indptr.append(len(indices))
+        vocab = sorted(index, key=index.get)
+        return cls(vocab, candidate_ids, indptr, indices, fingerprint)
+
+    def __len__(self):
+        return len(self.candidate_ids)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            vocab=np.array(self.vocab, dtype=str),
+            candidate_ids=self.candidate_ids,
+            indptr=self.indptr,
+            indices=self.indices,
+            fingerprint=np.array(self.fingerprint)
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(
+                data["vocab"].tolist(), data["candidate_ids"], data["indptr"], data["indices"], str(data["fingerprint"])
+            )
+
+    def frequencies(self):
+        """Number of candidates having each skill, as {skill: count}."""
+        counts = np.bincount(self.indices, minlength=len(self.vocab))
+        return dict(zip(self.vocab, counts.tolist()))
+
+    def weight_vector(self, weights):
+        """
+        Dense weight per vocabulary skill from {skill: weight}.
+
+        Returns:
+            (vector, unknown) where unknown lists requested skills no candidate has
+        """
+        vector = np.zeros(len(self.vocab), dtype=np.float32)
+        unknown = []
+        for skill, weight in weights.items():
+            column = self.index.get(normalize_skill(skill))
+            if column is None:
+                unknown.append(skill)
+            else:
+                vector[column] += float(weight)
+        return vector, unknown
+
+    def scores(self, weights):
+        """
+        Weighted match score of every candidate, 0-100.
+
+        A candidate's score is the sum of the weights of the requested skills
+        they have, over the sum of all positive requested weights (negative
+        weights penalise a skill).
+
+        Returns:
+            (scores, unknown) with scores aligned with candidate_ids
+        """
+        vector, unknown = self.weight_vector(weights)
+        total = sum(float(weight) for weight in weights.values() if float(weight) > 0)
+        if not total or not len(self):
+            return np.zeros(len(self), dtype=np.float32), unknown
+
+        # Segmented sum of the gathered weights per row; empty rows score 0
+        gathered = np.concatenate([[0.0], np.cumsum(vector[self.indices], dtype=np.float64)])
+        sums = gathered[self.indptr[1:]] - gathered[self.indptr[:-1]]
+        return np.clip(sums / total * 100, 0, 100).astype(np.float32), unknown
+
+    def rank(self, weights, top_n=50, candidate_ids=None):
+        """
+        Best candidates for a weighted skill vector.
+
+        Args:
+            weights: {skill: weight}
+            top_n: Number of candidates to return
+            candidate_ids: Optional ids to restrict the ranking to
+
+        Returns:
+            (ranking, unknown) where ranking is a list of (candidate_id, score), best first
+        """
+        scores, unknown = self.scores(weights)
+        rows = np.arange(len(self))
+        if candidate_ids is not None:
+            rows = rows[np.isin(self.candidate_ids, np.asarray(list(candidate_ids), dtype=np.int64))]
+        if top_n and len(rows) > top_n:
+            rows = rows[np.argpartition(-scores[rows], top_n - 1)[:top_n]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return [(int(self.candidate_ids[row]), round(float(scores[row]), 2)) for row in rows], unknown
+
+    def skills_of(self, candidate_id):
+        """Vocabulary skills of one candidate."""
+        rows = np.flatnonzero(self.candidate_ids == candidate_id)
+        if not len(rows):
+            return []
+        row = rows[0]
+        return [self.vocab[i] for i in self.indices[self.indptr[row]:self.indptr[row + 1]]]
+
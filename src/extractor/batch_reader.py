@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from .pdf_reader import extract_document
+from src.utils.metrics import inc
+
+# Worker processes used for batch extraction (defaults to the number of CPUs)
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0")) or os.cpu_count() or 1
+
+
+def _extract_worker(pdf_path):
+    return extract_document(str(pdf_path))
+
+
+def _new_pool(max_workers):
+    # spawn keeps workers independent of the parent's threads and open handles
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _run_isolated(pdf_path):
+    """Re-run a single file in its own worker process."""
+    with _new_pool(1) as pool:
+        try:
+            return pool.submit(_extract_worker, pdf_path).result(), None
+        except BrokenProcessPool:
+            return None, RuntimeError("Extraction worker crashed while reading this file")
+        except Exception as e:
+            return None, e
+
+
+def iter_extract_documents(pdf_paths, max_workers=None):
+    """
+    Extracts many PDFs in parallel over a process pool.
+
+    Results are yielded as soon as each file finishes, not in input order.
+    At most max_workers files are in flight at a time, so if a malformed PDF
+    crashes its worker only those in-flight files are affected: they are
+    retried one by one in isolated processes while the rest of the batch
+    continues in a fresh pool.
+
+    Args:
+        pdf_paths: Iterable of PDF paths (str or Path)
+        max_workers: Number of worker processes (defaults to EXTRACTION_WORKERS)
+
+    Yields:
+        (pdf_path, document, error) where document is the extract_document()
+        result and error is the exception raised for that file (or None)
+    """
+    workers = max_workers or EXTRACTION_WORKERS
+    queue = deque(pdf_paths)
+    suspects = []
+
+    if workers <= 1:
+        # No point paying process start-up for a single worker
+        for pdf_path in queue:
+            try:
+                yield pdf_path, extract_document(str(pdf_path)), None
+            except Exception as e:
+                yield pdf_path, None, e
+        return
+
+    while queue:
+        pool = _new_pool(min(workers, len(queue)))
+        in_flight = {}
+        try:
+            while queue or in_flight:
+                while queue and len(in_flight) < workers:
+                    pdf_path = queue.popleft()
+                    in_flight[pool.submit(_extract_worker, pdf_path)] = pdf_path
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                broken = False
+
+                for future in done:
+                    pdf_path = in_flight.pop(future)
+                    try:
+                        yield pdf_path, future.result(), None
+                    except BrokenProcessPool:
+                        suspects.append(pdf_path)
+                        broken = True
+                    except Exception as e:
+                        yield pdf_path, None, e
+
+                if broken:
+                    # Everything still in flight died with the pool; any of them may be the culprit
+                    suspects.extend(in_flight.values())
+                    in_flight.clear()
+                    print(f"⚠️  Extraction worker crashed; retrying {len(suspects)} file(s) in isolation")
+                    break
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    for pdf_path in suspects:
+        inc("hr_retries_total", operation="extract_isolated")
+        document, error = _run_isolated(pdf_path)
+        yield pdf_path, document, error
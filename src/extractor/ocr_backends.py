@@ -0,0 +1,202 @@
+import os
+import time
+from functools import lru_cache
+from .vision_ocr import extract_text_from_image
+from src.utils.metrics import inc, observe
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+# OCR engines tried in order for each image page; a later tier only runs when
+# the previous one's confidence is below OCR_MIN_CONFIDENCE
+OCR_BACKENDS = [name.strip() for name in os.getenv("OCR_BACKENDS", "tesseract,vision").split(",") if name.strip()]
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "0.8"))
+
+# Resolution pages are rendered at when a local engine is configured
+# (Tesseract is most accurate around 300 DPI; Vision gets a downscaled copy)
+LOCAL_OCR_DPI = int(os.getenv("LOCAL_OCR_DPI", "300"))
+TESSERACT_LANG = os.getenv("TESSERACT_LANG", "eng")
+
+
+class OCRBackend:
+    """
+    One way of reading the text of a page rendered by render_page_image.
+
+    Subclasses set name (as used in OCR_BACKENDS) and local (runs on this
+    machine, so pages are rendered at LOCAL_OCR_DPI), and implement
+    recognize(). Backends are shared between threads.
+    """
+
+    name = ""
+    local = False
+
+    def available(self):
+        """Whether the backend can run in this deployment."""
+        return True
+
+    def recognize(self, image, page_num, usage=None):
+        """
+        Read the text of one page.
+
+        Args:
+            image: Rendered page from render_page_image
+            page_num: Page number (0-indexed, for logging)
+            usage: Optional dict that API token counts and cost are added to
+
+        Returns:
+            (text, confidence) with confidence in 0-1, or None when the
+            backend does not report one (its text is then always accepted)
+        """
+        raise NotImplementedError
+
+
+BACKEND_CLASSES = {}
+
+
+def register_backend(cls):
+    """Class decorator making a backend selectable by name in OCR_BACKENDS."""
+    BACKEND_CLASSES[cls.name] = cls
+    return cls
+
+
+@register_backend
+class TesseractBackend(OCRBackend):
+    """Local CPU OCR with Tesseract; confidence is the mean word confidence, weighted by length."""
+
+    name = "tesseract"
+    local = True
+
+    def available(self):
+        if pytesseract is None:
+            return False
+        try:
+            pytesseract.get_tesseract_version()
+        except Exception:
+            return False
+        return True
+
+    def recognize(self, image, page_num, usage=None):
+        data = pytesseract.image_to_data(image["pixels"], lang=TESSERACT_LANG, output_type=pytesseract.Output.DICT)
+
+        # Words grouped into lines in reading order
+        lines = {}
+        weighted = 0.0
+        chars = 0
+        for i, word in enumerate(data["text"]):
+            word = word.strip()
+            confidence = float(data["conf"][i])
+            if not word or confidence < 0:
+                continue
+            lines.setdefault((data["block_num"][i], data["par_num"][i], data["line_num"][i]), []).append(word)
+            weighted += confidence * len(word)
+            chars += len(word)
+
+        text_lines = []
+        paragraph = None
+        for (block, par, _), words in lines.items():
+            if paragraph is not None and (block, par) != paragraph:
+                text_lines.append("")
+            text_lines.append(" ".join(words))
+            paragraph = (block, par)
+
+        return "\n".join(text_lines), (weighted / chars / 100 if chars else 0.0)
+
+
+@register_backend
+class VisionBackend(OCRBackend):
+    """OpenAI Vision (one API call per page)."""
+
+    name = "vision"
+
+    def recognize(self, image, page_num, usage=None):
+        return extract_text_from_image(image, page_num, usage, raise_errors=True), None
+
+
+@lru_cache(maxsize=1)
+def get_backends():
+    """
+    The available backends of OCR_BACKENDS, in tier order.
+
+    Unknown or unavailable backends are skipped with a warning; Vision is
+    used when nothing else is left.
+    """
+    backends = []
+    for name in OCR_BACKENDS:
+        cls = BACKEND_CLASSES.get(name)
+        if cls is None:
+            print(f"⚠️  Unknown OCR backend '{name}' in OCR_BACKENDS (known: {', '.join(BACKEND_CLASSES)})")
+            continue
+        backend = cls()
+        if not backend.available():
+            print(f"⚠️  OCR backend '{name}' is not available in this environment, skipping it")
+            continue
+        backends.append(backend)
+    return backends or [VisionBackend()]
+
+
+def render_dpi():
+    """Minimum resolution to render OCR pages at for the configured backends."""
+    return LOCAL_OCR_DPI if any(backend.local for backend in get_backends()) else 0
+
+
+def recognize_page(image, page_num, usage=None):
+    """
+    OCR one rendered page through the backend tiers.
+
+    Each backend's result is accepted when it has text and its confidence
+    is at least OCR_MIN_CONFIDENCE; otherwise the next tier is tried. If no
+    tier is confident, the first non-empty text is kept. A backend that
+    raises counts as an error; one that finds no text does not. Per-backend
+    latency and confidence are recorded in the metrics store.
+
+    Args:
+        image: Rendered page from render_page_image
+        page_num: Page number (0-indexed, for logging)
+        usage: Optional dict that API token counts and cost are added to
+
+    Returns:
+        dict with 'text', 'engine' (backend that produced it), 'confidence'
+        and 'error' (True if no text was read because backends failed)
+    """
+    fallback = None
+    failed = False
+    for backend in get_backends():
+        start = time.perf_counter()
+        try:
+            text, confidence = backend.recognize(image, page_num, usage)
+        except Exception as e:
+            inc("hr_errors_total", operation="ocr", backend=backend.name)
+            print(f"❌ OCR backend '{backend.name}' failed on page {page_num + 1}: {e}")
+            failed = True
+            continue
+        finally:
+            observe("hr_ocr_backend_seconds", time.perf_counter() - start, backend=backend.name)
+
+        text = (text or "").strip()
+        if confidence is not None:
+            observe("hr_ocr_confidence", confidence, backend=backend.name)
+        result = {
+            "text": text, "engine": backend.name,
+            "confidence": None if confidence is None else round(confidence, 3), "error": False
+        }
+
+        if text and (confidence is None or confidence >= OCR_MIN_CONFIDENCE):
+            inc("hr_ocr_pages_by_backend_total", backend=backend.name, outcome="accepted")
+            if confidence is not None:
+                print(f"   🔤 Page {page_num + 1}: read by {backend.name} (confidence {confidence:.0%})")
+            return result
+
+        inc("hr_ocr_pages_by_backend_total", backend=backend.name, outcome="fallback")
+        if text:
+            print(f"   ↪️  Page {page_num + 1}: {backend.name} confidence {confidence:.0%} is below {OCR_MIN_CONFIDENCE:.0%}")
+        else:
+            print(f"   ↪️  Page {page_num + 1}: {backend.name} returned no text")
+        if text and fallback is None:
+            fallback = result
+
+    if fallback:
+        print(f"⚠️  No confident OCR for page {page_num + 1}, keeping the {fallback['engine']} text")
+        return fallback
+    return {"text": "", "engine": None, "confidence": None, "error": failed}
@@ -0,0 +1,109 @@
+import os
+import pymupdf
+
+# Pages with less readable embedded text than this are scanned
+MIN_TEXT_CHARS = int(os.getenv("OCR_MIN_TEXT_CHARS", "20"))
+
+# Images covering less of the page than this (logos, photos, icons) are never OCR'd
+MIN_OCR_IMAGE_AREA = float(os.getenv("OCR_MIN_IMAGE_AREA", "0.1"))
+
+# An image with at least this many characters of embedded text on top of it is a
+# background (or a scan that already has a text layer), not something to OCR
+BACKGROUND_TEXT_CHARS = 100
+
+# A page this much covered by images to OCR, with no more than SCANNED_TEXT_CHARS
+# of stray text (scanner stamps, page numbers), is OCR'd as a whole
+SCANNED_COVERAGE = 0.8
+SCANNED_TEXT_CHARS = 200
+
+# Spans in smaller fonts (hidden keyword stuffing, artefacts) don't count as content
+MIN_FONT_SIZE = 4
+
+# Share of unmapped glyphs above which the embedded text is unreadable
+GARBLED_RATIO = 0.3
+
+
+def _is_garbled(char):
+    """Replacement or private-use character: a glyph with no Unicode mapping."""
+    return char == "�" or 0xE000 <= ord(char) <= 0xF8FF
+
+
+def _rect_area(rect):
+    return max(rect.width, 0) * max(rect.height, 0)
+
+
+def classify_page(page):
+    """
+    Decide how to read a PDF page: from its embedded text, by OCR, or both.
+
+    Looks at the text blocks (how much readable text there is, ignoring
+    tiny fonts and glyphs without a Unicode mapping) and at the image
+    placements (how much of the page they cover, and whether text already
+    sits on top of them). Short but real text pages, such as a last page
+    with references, stay text pages.
+
+    Args:
+        page: PyMuPDF page
+
+    Returns:
+        dict with 'kind' ('text', 'scanned' or 'mixed'), 'text' (embedded
+        text), 'clip' (region to OCR on mixed pages, else None), 'chars'
+        (readable embedded characters) and 'image_coverage' (fraction of
+        the page covered by images that need OCR)
+    """
+    page_rect = page.rect
+    page_area = _rect_area(page_rect) or 1
+
+    # Readable characters per text block
+    blocks = []
+    chars = 0
+    garbled = 0
+    for block in page.get_text("dict")["blocks"]:
+        if block["type"] != 0:
+            continue
+        block_chars = 0
+        for line in block["lines"]:
+            for span in line["spans"]:
+                if span["size"] < MIN_FONT_SIZE:
+                    continue
+                for char in span["text"]:
+                    if char.isspace():
+                        continue
+                    block_chars += 1
+                    garbled += _is_garbled(char)
+        if block_chars:
+            blocks.append((pymupdf.Rect(block["bbox"]), block_chars))
+            chars += block_chars
+    if chars and garbled / chars > GARBLED_RATIO:
+        chars = 0
+
+    # Images large enough to hold text and without a text layer on top
+    ocr_rects = []
+    for info in page.get_image_info():
+        bbox = pymupdf.Rect(info["bbox"]) & page_rect
+        if _rect_area(bbox) / page_area < MIN_OCR_IMAGE_AREA:
+            continue
+        text_on_top = sum(
+            block_chars for rect, block_chars in blocks
+            if bbox.contains((rect.tl + rect.br) / 2)
+        )
+        if text_on_top < BACKGROUND_TEXT_CHARS:
+            ocr_rects.append(bbox)
+    coverage = min(sum(_rect_area(rect) for rect in ocr_rects) / page_area, 1.0)
+
+    if chars < MIN_TEXT_CHARS or (coverage >= SCANNED_COVERAGE and chars <= SCANNED_TEXT_CHARS):
+        kind, clip = "scanned", None
+    elif ocr_rects:
+        kind, clip = "mixed", pymupdf.Rect(ocr_rects[0])
+        for rect in ocr_rects[1:]:
+            clip |= rect
+    else:
+        kind, clip = "text", None
+
+    return {
+        "kind": kind,
+        "text": page.get_text().strip() if chars else "",
+        "clip": clip,
+        "chars": chars,
+        "image_coverage": round(coverage, 3),
+    }
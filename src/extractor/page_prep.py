@@ -0,0 +1,193 @@
+import os
+import numpy as np
+import pymupdf
+
+# OpenCV is optional at runtime: without it pages are sent uncropped and
+# resized/encoded with PyMuPDF
+try:
+    import cv2
+except ImportError as e:
+    cv2 = None
+    print(f"⚠️  OpenCV unavailable ({e}), OCR pages will not be cropped")
+
+# Set to 0 to always send the full page image to Vision OCR
+OCR_CROP_REGIONS = os.getenv("OCR_CROP_REGIONS", "1") == "1"
+
+# Largest skew (degrees) corrected before region detection, and the search step
+MAX_SKEW_DEGREES = 5.0
+SKEW_STEP_DEGREES = 0.5
+
+# Regions whose bounding box is more than this fraction ink are photos or solid
+# decoration, not text
+PHOTO_FILL = 0.45
+
+# White space (pixels) kept around and between the text bands that are stacked
+BAND_PADDING = 12
+
+# Cropping that keeps more than this fraction of the page is not worth a re-encode
+MIN_SAVING = 0.1
+
+
+def pixmap_to_array(pix):
+    """Grayscale PyMuPDF pixmap as a 2-D uint8 NumPy array."""
+    array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return np.ascontiguousarray(array[:, :pix.width])
+
+
+def _binarize(gray):
+    """Ink mask (255 = ink) with Otsu thresholding."""
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+
+
+def _rotate(image, angle, border=255):
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(
+        image, matrix, (width, height), flags=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_CONSTANT, borderValue=border
+    )
+
+
+def estimate_skew(binary):
+    """
+    Skew angle (degrees) that makes the text lines of an ink mask horizontal.
+
+    Uses the projection profile: when lines are level, the row sums
+    alternate sharply between text and gaps, so their variance peaks.
+    The search runs on a downscaled mask, so it stays cheap.
+    """
+    scale = min(1.0, 600 / max(binary.shape))
+    small = cv2.resize(binary, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1 else binary
+
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-MAX_SKEW_DEGREES, MAX_SKEW_DEGREES + SKEW_STEP_DEGREES / 2, SKEW_STEP_DEGREES):
+        rows = _rotate(small, float(angle), border=0).sum(axis=1, dtype=np.float64)
+        score = float(np.var(rows))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def _remove_rules(binary):
+    """Drop long horizontal/vertical lines (borders, dividers) from an ink mask."""
+    height, width = binary.shape
+    horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (max(width // 8, 20), 1)))
+    vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(height // 8, 20))))
+    return cv2.subtract(binary, cv2.bitwise_or(horizontal, vertical))
+
+
+def find_text_regions(binary):
+    """
+    Bounding boxes (x, y, w, h) of the text blocks in an ink mask.
+
+    Characters are merged into lines with a wide dilation; borders and
+    dividers are removed first, and tiny specks and photo-like blocks
+    (mostly ink) are dropped.
+    """
+    height, width = binary.shape
+    text = _remove_rules(binary)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(width // 50, 9), 3))
+    merged = cv2.dilate(text, kernel)
+    contours = cv2.findContours(merged, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[0]
+
+    min_side = max(4, height // 300)
+    regions = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w < min_side or h < min_side:
+            continue
+        if np.count_nonzero(text[y:y + h, x:x + w]) / (w * h) > PHOTO_FILL:
+            continue
+        regions.append((x, y, w, h))
+    return regions
+
+
+def _bands(regions, gap):
+    """Merge regions into horizontal bands of (top, bottom), top to bottom."""
+    bands = []
+    for _, y, _, h in sorted(regions, key=lambda region: region[1]):
+        if bands and y <= bands[-1][1] + gap:
+            bands[-1][1] = max(bands[-1][1], y + h)
+        else:
+            bands.append([y, y + h])
+    return bands
+
+
+def crop_text_regions(gray):
+    """
+    Reduce a grayscale page image to its text.
+
+    Deskews the page, finds the text blocks, crops to their common width
+    (dropping margins, photos and borders) and stacks the horizontal bands
+    they form with the blank space between them collapsed, so Vision OCR
+    gets fewer image tiles for the same text at the same resolution.
+
+    Args:
+        gray: 2-D uint8 page image (white background)
+
+    Returns:
+        dict with 'image' (the cropped page), 'regions', 'angle' and 'kept'
+        (fraction of the page area kept), or None when no useful crop was
+        found (or OpenCV is not installed) and the full page should be sent
+    """
+    if cv2 is None:
+        return None
+
+    binary = _binarize(gray)
+    angle = estimate_skew(binary)
+    if angle:
+        gray = _rotate(gray, angle)
+        binary = _binarize(gray)
+
+    regions = find_text_regions(binary)
+    if not regions:
+        return None
+
+    height, width = gray.shape
+    left = max(min(x for x, _, _, _ in regions) - BAND_PADDING, 0)
+    right = min(max(x + w for x, _, w, _ in regions) + BAND_PADDING, width)
+
+    strips = []
+    for top, bottom in _bands(regions, BAND_PADDING):
+        strips.append(gray[max(top - BAND_PADDING // 2, 0):min(bottom + BAND_PADDING // 2, height), left:right])
+    image = np.vstack(strips)
+
+    kept = image.size / gray.size
+    if kept > 1 - MIN_SAVING and not angle:
+        return None
+    return {"image": image, "regions": len(regions), "angle": angle, "kept": kept}
+
+
+def _to_pixmap(gray):
+    height, width = gray.shape
+    return pymupdf.Pixmap(pymupdf.csGRAY, width, height, np.ascontiguousarray(gray).tobytes(), 0)
+
+
+def downscale(gray, scale):
+    """Resize an image by scale (< 1) with area averaging, which keeps thin strokes legible."""
+    if cv2 is None:
+        height, width = gray.shape
+        return pixmap_to_array(pymupdf.Pixmap(_to_pixmap(gray), max(round(width * scale), 1), max(round(height * scale), 1)))
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def encode_smallest(gray, jpeg_quality):
+    """
+    Encode a grayscale image as JPEG and PNG and keep the smaller one.
+
+    Returns:
+        (mime type, encoded bytes)
+    """
+    if cv2 is None:
+        pix = _to_pixmap(gray)
+        encodings = [("image/jpeg", pix.tobytes("jpeg", jpg_quality=jpeg_quality)), ("image/png", pix.tobytes("png"))]
+        return min(encodings, key=lambda encoding: len(encoding[1]))
+
+    encodings = []
+    ok, jpeg = cv2.imencode(".jpg", gray, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+    if ok:
+        encodings.append(("image/jpeg", jpeg.tobytes()))
+    ok, png = cv2.imencode(".png", gray, [cv2.IMWRITE_PNG_COMPRESSION, 9])
+    if ok:
+        encodings.append(("image/png", png.tobytes()))
+    return min(encodings, key=lambda encoding: len(encoding[1]))
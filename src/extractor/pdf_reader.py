@@ -1,43 +1,309 @@
-import pymupdf 
-from .vision_ocr import extract_text_with_vision_page
+import hashlib
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import pymupdf
+from .vision_ocr import render_page_image
+from .page_classifier import classify_page
+from .ocr_backends import recognize_page, render_dpi
+from src.core.compaction import PAGE_BREAK, RESUME_TOKEN_BUDGET
+from src.utils.disk_cache import DiskCache
+from src.utils.metrics import inc, observe
+from src.utils.tokens import add_usage, estimate_tokens
 
-def extract_text(pdf_path):
+# Bump whenever extraction logic changes so stale cached text is not reused
+EXTRACTOR_VERSION = "2"
+
+# Persistent cache of extracted text keyed by PDF content hash (0 MB disables it)
+EXTRACTION_CACHE_MAX_MB = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "256"))
+extraction_cache = DiskCache("extraction", max_bytes=EXTRACTION_CACHE_MAX_MB * 1024 * 1024)
+
+# Maximum number of Vision OCR requests in flight for a single document
+OCR_CONCURRENCY = max(1, int(os.getenv("OCR_CONCURRENCY", "4")))
+
+# Tokens of page text after which extraction stops (0 = all pages). Defaults to
+# twice the resume budget, leaving compaction room to pick the important sections.
+EXTRACTION_TOKEN_BUDGET = int(os.getenv("EXTRACTION_TOKEN_BUDGET", str(2 * RESUME_TOKEN_BUDGET)))
+
+# Expected text tokens of one OCR'd page, used to stop OCR-ing ahead near the budget
+OCR_PAGE_TOKENS = 600
+
+
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_pages(pdf_path, token_budget=0, usage=None):
     """
-    Extracts text from a PDF file. Handles both text-based and image-based PDFs.
-    - Tries text extraction first (fast and free)
-    - Falls back to OCR for pages with minimal/no text (image-based pages)
-    - Supports mixed PDFs (some pages text, some images)
+    Extracts text page by page, yielding each page as soon as it is ready.
+
+    Pages come out in order. OCR runs ahead in a thread pool (at most
+    OCR_CONCURRENCY pages in flight), but only as far as the pages already
+    queued are expected to stay within token_budget. Once the yielded text
+    reaches the budget the generator stops, so pages past it are never
+    rendered or OCR'd. Closing the generator early has the same effect.
+
+    Args:
+        pdf_path: PDF file
+        token_budget: Stop after this many tokens of page text (0 = all pages)
+        usage: Optional dict that the OCR token counts and cost of every call
+            made are added to, including calls whose page was not yielded
+
+    Yields:
+        dicts with the page number, 'total_pages', the source used ('text',
+        'ocr' or 'mixed'), the extracted text, 'failed' (True if OCR failed)
+        and, for OCR'd pages, the OCR engine and its confidence
     """
-    full_text = ""
-    
+    doc = pymupdf.open(pdf_path)
+    total_pages = len(doc)
+    entries = []
+    queue = deque()
+    executor = ThreadPoolExecutor(max_workers=OCR_CONCURRENCY)
+
     try:
-        doc = pymupdf.open(pdf_path)
-        total_pages = len(doc)
-        
-        for page_num in range(total_pages):
-            page = doc[page_num]
-            page_text = page.get_text().strip()
-            
-            # Check if page has sufficient text (>200 chars indicates proper text-based page)
-            # This threshold helps distinguish between:
-            # - Text PDFs with full content (use extracted text)
-            # - Image PDFs with minimal metadata (use OCR)
-            if len(page_text) > 200:
-                # Text-based page with substantial content - use extracted text
-                full_text += f"\n{page_text}\n"
-            else:
-                # Image-based page or minimal text - use OCR
-                print(f"   📷 Page {page_num + 1}/{total_pages}: Using OCR (image-based or minimal text)")
-                ocr_text = extract_text_with_vision_page(doc, page_num)
-                full_text += f"\n{ocr_text}\n"
-        
+        next_page = 0
+        used = 0
+        queued = 0
+        while next_page < total_pages or queue:
+            # Classify and render ahead while OCR slots are free and the queued
+            # pages are not already expected to fill the budget
+            while (
+                next_page < total_pages
+                and sum(future is not None for _, future, _ in queue) < OCR_CONCURRENCY
+                and not (token_budget and used + queued >= token_budget)
+            ):
+                page_num = next_page
+                next_page += 1
+                layout = classify_page(doc[page_num])
+
+                if layout["kind"] == "text":
+                    # Text-based page - use extracted text
+                    entry = {"page": page_num + 1, "source": "text", "text": layout["text"], "failed": False}
+                    projected = estimate_tokens(entry["text"])
+                    queue.append((entry, None, projected))
+                    queued += projected
+                    continue
+
+                # Scanned page, or text page with images to read (mixed) - use OCR.
+                # Rasterize here (PyMuPDF is not thread-safe) and OCR in the pool.
+                if layout["kind"] == "scanned":
+                    print(f"   📷 Page {page_num + 1}/{total_pages}: Using OCR (scanned page)")
+                    entry = {"page": page_num + 1, "source": "ocr", "text": "", "failed": False, "usage": {}}
+                else:
+                    print(
+                        f"   🧩 Page {page_num + 1}/{total_pages}: Using text + OCR of image regions "
+                        f"({layout['image_coverage']:.0%} of page)"
+                    )
+                    entry = {"page": page_num + 1, "source": "mixed", "text": layout["text"], "failed": False, "usage": {}}
+                entries.append(entry)
+                projected = estimate_tokens(entry["text"]) + OCR_PAGE_TOKENS
+                queued += projected
+
+                try:
+                    image = render_page_image(doc, page_num, render_dpi(), clip=layout["clip"])
+                except Exception as e:
+                    print(f"❌ Error with Vision OCR for page {page_num + 1}: {e}")
+                    entry["failed"] = True
+                    image = None
+                # Blank pages (image is None) have nothing to OCR
+                future = executor.submit(recognize_page, image, page_num, entry["usage"]) if image else None
+                queue.append((entry, future, projected))
+
+            entry, future, projected = queue.popleft()
+            if future is not None:
+                result = future.result()
+                # Don't let OCR errors get cached as the final text. An image on a mixed page
+                # may hold no text (a logo, a photo); a scanned page without any is suspect.
+                entry["failed"] = result.pop("error") or (entry["source"] == "ocr" and not result["text"])
+                if entry["source"] == "mixed":
+                    result["text"] = "\n\n".join(part for part in (entry["text"], result["text"]) if part)
+                entry.update(result)
+            queued -= projected
+            used += estimate_tokens(entry["text"])
+
+            yield {"total_pages": total_pages, **{key: value for key, value in entry.items() if key != "usage"}}
+
+            if token_budget and used >= token_budget:
+                if entry["page"] < total_pages:
+                    print(f"   ✂️  Token budget of {token_budget} reached after page {entry['page']}/{total_pages}, skipping the rest")
+                break
+    finally:
+        # Drop OCR that has not started; calls already running still finish and are charged
+        executor.shutdown(wait=True, cancel_futures=True)
         doc.close()
-        
-        # Final check: if entire PDF yielded minimal text, it might have failed
-        if len(full_text.strip()) < 100:
-            print(f"⚠️  Minimal text extracted from {pdf_path}. This might be an issue.")
-            
+        if usage is not None:
+            for entry in entries:
+                add_usage(usage, entry["usage"])
+
+
+def _cache_covers(cached, token_budget):
+    """True unless a cached extraction was cut short by a smaller budget than token_budget."""
+    return not cached.get("truncated") or bool(token_budget) and token_budget <= cached["token_budget"]
+
+
+def extract_document(pdf_path, use_cache=True, token_budget=None):
+    """
+    Extracts text from a PDF together with per-page provenance.
+
+    Pages are read with iter_pages, so extraction stops (and skips the OCR of
+    the remaining pages) once token_budget tokens of text have been read.
+
+    Results are cached by the SHA-256 of the PDF bytes (plus EXTRACTOR_VERSION),
+    so the same file is only parsed/OCR'd once even if it is re-uploaded under
+    a different name. A cached extraction cut short by a smaller budget than
+    the current one is redone.
+
+    Args:
+        pdf_path: PDF file
+        use_cache: Read and write the extraction cache
+        token_budget: Stop after this many tokens of page text
+            (None = EXTRACTION_TOKEN_BUDGET, 0 = all pages)
+
+    Returns:
+        dict with 'text', 'pages' (page, source, chars, and for OCR pages the
+        engine and its confidence), 'truncated' (True if pages were skipped
+        for the budget), 'sha256', 'cached' and 'usage' (Vision OCR tokens
+        and cost spent by this call; empty when cached)
+    """
+    if token_budget is None:
+        token_budget = EXTRACTION_TOKEN_BUDGET
+    start = time.perf_counter()
+    sha256 = None
+    cache_key = None
+
+    if use_cache and EXTRACTION_CACHE_MAX_MB > 0:
+        try:
+            sha256 = file_sha256(pdf_path)
+            cache_key = f"v{EXTRACTOR_VERSION}:{sha256}"
+            cached = extraction_cache.get(cache_key)
+            if cached is not None and _cache_covers(cached, token_budget):
+                cached["cached"] = True
+                cached["usage"] = {}
+                observe("hr_extract_seconds", time.perf_counter() - start, cached="true")
+                return cached
+        except OSError as e:
+            print(f"❌ Error reading {pdf_path}: {e}")
+            inc("hr_errors_total", operation="extract")
+            return {"text": "", "pages": [], "sha256": None, "cached": False, "usage": {}}
+
+    pages = []
+    usage = {}
+    complete = True
+    try:
+        for page in iter_pages(pdf_path, token_budget, usage):
+            pages.append(page)
+            complete = complete and not page["failed"]
     except Exception as e:
         print(f"❌ Error reading {pdf_path}: {e}")
-    
-    return full_text
\ No newline at end of file
+        complete = False
+    truncated = bool(pages) and len(pages) < pages[-1]["total_pages"]
+
+    full_text = PAGE_BREAK.join(f"\n{page['text']}\n" for page in pages)
+
+    # Final check: if entire PDF yielded minimal text, it might have failed
+    if len(full_text.strip()) < 100:
+        print(f"⚠️  Minimal text extracted from {pdf_path}. This might be an issue.")
+
+    result = {
+        "text": full_text,
+        "pages": [
+            {
+                "page": page["page"], "source": page["source"], "chars": len(page["text"]),
+                **{key: page[key] for key in ("engine", "confidence") if key in page}
+            }
+            for page in pages
+        ],
+        "truncated": truncated,
+        "token_budget": token_budget,
+        "sha256": sha256,
+        "cached": False,
+        "usage": usage,
+    }
+
+    if cache_key and complete:
+        extraction_cache.set(cache_key, {k: v for k, v in result.items() if k not in ("cached", "usage")})
+
+    for source in ("text", "ocr", "mixed"):
+        inc("hr_pages_total", sum(1 for page in pages if page["source"] == source), source=source)
+    if not complete:
+        inc("hr_errors_total", operation="extract")
+    observe("hr_extract_seconds", time.perf_counter() - start, cached="false")
+
+    return result
+
+
+def inspect_document(pdf_path, token_budget=None):
+    """
+    Cheap, local look at what extracting a PDF would involve, without OCR.
+
+    Reuses the cached extraction when there is one; otherwise classifies
+    each page with the same classify_page rule as extract_document, up to
+    where the token budget would stop extraction.
+
+    Args:
+        pdf_path: PDF file
+        token_budget: As for extract_document
+
+    Returns:
+        dict with 'pages', 'ocr_pages' (scanned and mixed pages, which need
+        one OCR call each), 'text' (embedded text of the text and mixed
+        pages, or the full cached text) and 'cached'
+    """
+    if token_budget is None:
+        token_budget = EXTRACTION_TOKEN_BUDGET
+
+    if EXTRACTION_CACHE_MAX_MB > 0:
+        cached = extraction_cache.get(f"v{EXTRACTOR_VERSION}:{file_sha256(pdf_path)}")
+        if cached is not None and _cache_covers(cached, token_budget):
+            return {"pages": len(cached["pages"]), "ocr_pages": 0, "text": cached["text"], "cached": True}
+
+    texts = []
+    ocr_pages = 0
+    tokens = 0
+    doc = pymupdf.open(pdf_path)
+    try:
+        total_pages = len(doc)
+        for page_num in range(total_pages):
+            if token_budget and tokens >= token_budget:
+                break
+            layout = classify_page(doc[page_num])
+            if layout["kind"] != "text":
+                ocr_pages += 1
+                tokens += OCR_PAGE_TOKENS
+            if layout["kind"] != "scanned" and layout["text"]:
+                texts.append(layout["text"])
+                tokens += estimate_tokens(layout["text"])
+    finally:
+        doc.close()
+
+    return {
+        "pages": total_pages,
+        "ocr_pages": ocr_pages,
+        "text": PAGE_BREAK.join(f"\n{text}\n" for text in texts),
+        "cached": False,
+    }
+
+
+def extract_text(pdf_path):
+    """
+    Extracts text from a PDF file. Handles both text-based and image-based PDFs.
+    - Tries text extraction first (fast and free)
+    - Falls back to OCR for scanned pages (see page_classifier.classify_page)
+    - Supports mixed PDFs (some pages text, some images) and text pages with
+      images to read, where only the image regions are OCR'd
+    - Stops once EXTRACTION_TOKEN_BUDGET tokens of text have been read, so
+      pages that compaction would cut anyway are never OCR'd
+    - Reuses previously extracted text for identical files (content-hash cache)
+    """
+    return extract_document(pdf_path)["text"]
+
+
+def extraction_cache_stats():
+    """Return hit/miss/size counters for the extraction cache."""
+    return extraction_cache.stats()
@@ -1,37 +1,159 @@
 import base64
 import os
+import time
 from openai import OpenAI
 from dotenv import load_dotenv
 import pymupdf
+from .page_prep import OCR_CROP_REGIONS, crop_text_regions, pixmap_to_array, downscale, encode_smallest
+from src.utils.metrics import timed, inc, observe, record_usage
+from src.utils.tokens import usage_from_response, add_usage
 
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+OCR_MODEL = "gpt-4o-mini"
 
-def extract_text_with_vision_page(doc, page_num):
+# Rasterization policy: short side in pixels for detail=high (the size the model
+# downsamples to), JPEG quality, and the ink coverage below which detail=low is used
+OCR_TARGET_SHORT_SIDE = int(os.getenv("OCR_TARGET_SHORT_SIDE", "768"))
+OCR_JPEG_QUALITY = int(os.getenv("OCR_JPEG_QUALITY", "75"))
+OCR_LOW_DETAIL_INK = float(os.getenv("OCR_LOW_DETAIL_INK", "0.005"))
+
+# detail=low images are processed within a 512x512 box
+LOW_DETAIL_SIDE = 512
+
+
+def render_page_image(doc, page_num, min_dpi=0, clip=None):
     """
-    Extract text from a single page of an image-based PDF using OpenAI Vision API
-    
+    Rasterize a single PDF page for OCR.
+
+    Rendering must happen on the thread that owns the PyMuPDF document;
+    the returned image can then be OCR'd from any thread.
+
+    The page is rendered in grayscale at the zoom Vision needs: the short
+    side lands at OCR_TARGET_SHORT_SIDE pixels (what detail=high downsamples
+    to anyway), or at least min_dpi for local OCR engines, in which case the
+    Vision payload is downscaled when it is encoded. With OCR_CROP_REGIONS
+    on, the page is deskewed and cut down to its text regions (see
+    page_prep.crop_text_regions), falling back to the full page when
+    detection fails. Nearly empty pages (ink coverage under
+    OCR_LOW_DETAIL_INK, e.g. a signature or a closing line) are marked for
+    detail=low, which has a fixed, small image token cost; blank pages are
+    not OCR'd at all.
+
     Args:
         doc: PyMuPDF document object
-        page_num: Page number to extract (0-indexed)
-    
+        page_num: Page number to render (0-indexed)
+        min_dpi: Minimum render resolution (0 = what Vision needs)
+        clip: Optional pymupdf.Rect to render instead of the whole page
+
     Returns:
-        Extracted text from the page
+        dict with 'pixels' (2-D grayscale array), 'detail', 'vision_scale'
+        (factor to apply for Vision) and the chosen settings, or None for a
+        blank page
+    """
+    page = doc[page_num]
+    area = clip or page.rect
+
+    with timed("hr_ocr_render_seconds"):
+        # Ink coverage from a cheap low-resolution preview
+        preview = page.get_pixmap(matrix=pymupdf.Matrix(0.5, 0.5), colorspace=pymupdf.csGRAY, clip=clip)
+        if preview.is_unicolor:
+            print(f"   🖼️  Page {page_num + 1}: blank, skipping OCR")
+            return None
+        ink = 1 - preview.color_topusage()[0]
+        detail = "low" if ink < OCR_LOW_DETAIL_INK else "high"
+
+        if detail == "low":
+            vision_zoom = LOW_DETAIL_SIDE / max(area.width, area.height)
+        else:
+            vision_zoom = OCR_TARGET_SHORT_SIDE / min(area.width, area.height)
+        vision_zoom = min(max(vision_zoom, 0.5), 4)
+        zoom = max(vision_zoom, min_dpi / 72)
+        pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), colorspace=pymupdf.csGRAY, clip=clip)
+        pixels = pixmap_to_array(pix)
+
+        crop = None
+        if detail == "high" and OCR_CROP_REGIONS:
+            try:
+                with timed("hr_ocr_crop_seconds"):
+                    crop = crop_text_regions(pixels)
+            except Exception as e:
+                print(f"⚠️  Text region detection failed for page {page_num + 1}, using full page: {e}")
+        if crop:
+            pixels = crop["image"]
+
+    size = (pixels.shape[1], pixels.shape[0])
+    cropped = (
+        f", cropped to {crop['regions']} regions ({crop['kept']:.0%} of page, deskew {crop['angle']:+.1f}°)"
+        if crop else ""
+    )
+    print(
+        f"   🖼️  Page {page_num + 1}: zoom {zoom:.2f}, {size[0]}x{size[1]} gray, "
+        f"detail={detail} (ink {ink:.1%}){cropped}"
+    )
+    inc("hr_ocr_pixels_saved_total", (pix.width * pix.height - size[0] * size[1]) * (vision_zoom / zoom) ** 2)
+
+    return {
+        "pixels": pixels,
+        "detail": detail,
+        "zoom": round(zoom, 2),
+        "vision_scale": vision_zoom / zoom,
+        "size": size,
+        "ink": round(ink, 4),
+        "cropped": bool(crop),
+    }
+
+
+def encode_page_image(image, page_num):
+    """
+    Encode a rendered page for the Vision API: downscaled to the Vision
+    resolution, as the smaller of JPEG and PNG.
+
+    Returns:
+        (mime type, base64 data)
+    """
+    pixels = image["pixels"]
+    if image["vision_scale"] < 1:
+        pixels = downscale(pixels, image["vision_scale"])
+    mime, img_data = encode_smallest(pixels, OCR_JPEG_QUALITY)
+
+    print(
+        f"   📤 Page {page_num + 1}: sending {pixels.shape[1]}x{pixels.shape[0]} {mime.split('/')[1]} "
+        f"{len(img_data) / 1024:.0f} KB to Vision, detail={image['detail']}"
+    )
+    inc("hr_ocr_image_bytes_total", len(img_data), detail=image["detail"])
+    return mime, base64.b64encode(img_data).decode('utf-8')
+
+
+def extract_text_from_image(image, page_num, usage=None, raise_errors=False):
+    """
+    Extract text from a rendered page image using OpenAI Vision API.
+    Safe to call concurrently from worker threads.
+
+    Args:
+        image: Rendered page from render_page_image
+        page_num: Page number the image came from (0-indexed, for logging)
+        usage: Optional dict that the call's token counts and cost are added to
+        raise_errors: Let encoding and API errors propagate instead of returning ""
+
+    Returns:
+        Extracted text from the page ("" on failure)
     """
     try:
-        page = doc[page_num]
-        
-        # Convert page to image with higher resolution for better OCR
-        pix = page.get_pixmap(matrix=pymupdf.Matrix(2, 2))  # 2x zoom for better quality
-        img_data = pix.tobytes("png")
-        
-        # Convert to base64
-        base64_image = base64.b64encode(img_data).decode('utf-8')
-        
+        mime, data = encode_page_image(image, page_num)
+    except Exception as e:
+        if raise_errors:
+            raise
+        inc("hr_errors_total", operation="vision_ocr")
+        print(f"❌ Error encoding page {page_num + 1} for Vision OCR: {e}")
+        return ""
+
+    start = time.perf_counter()
+    try:
         # Use OpenAI Vision API to extract text
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=OCR_MODEL,
             messages=[
                 {
                     "role": "user",
@@ -43,8 +165,8 @@ def extract_text_with_vision_page(doc, page_num):
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}",
-                                "detail": "high"  # Use high detail for better text recognition
+                                "url": f"data:{mime};base64,{data}",
+                                "detail": image["detail"]
                             }
                         }
                     ]
@@ -52,14 +174,43 @@ def extract_text_with_vision_page(doc, page_num):
             ],
             max_tokens=2000
         )
+        observe("hr_llm_request_seconds", time.perf_counter() - start, kind="ocr")
+        record_usage(response, "ocr")
+        if usage is not None:
+            add_usage(usage, usage_from_response(response.usage, OCR_MODEL))
         
         return response.choices[0].message.content
         
     except Exception as e:
+        if raise_errors:
+            raise
+        inc("hr_errors_total", operation="vision_ocr")
         print(f"❌ Error with Vision OCR for page {page_num + 1}: {e}")
         return ""
 
 
+def extract_text_with_vision_page(doc, page_num):
+    """
+    Extract text from a single page of an image-based PDF using OpenAI Vision API
+    
+    Args:
+        doc: PyMuPDF document object
+        page_num: Page number to extract (0-indexed)
+    
+    Returns:
+        Extracted text from the page
+    """
+    try:
+        image = render_page_image(doc, page_num)
+    except Exception as e:
+        print(f"❌ Error with Vision OCR for page {page_num + 1}: {e}")
+        return ""
+
+    if image is None:
+        return ""
+    return extract_text_from_image(image, page_num)
+
+
 def extract_text_with_vision(pdf_path):
     """
     Extract text from entire image-based PDF using OpenAI Vision API
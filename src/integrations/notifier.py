@@ -6,6 +6,8 @@ from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
 from email import encoders
 import os
+from time import perf_counter
+from src.utils.metrics import inc, observe
 
 # Common carrier gateways for Email-to-SMS
 SMS_GATEWAYS = [
@@ -38,13 +40,16 @@ def send_interview_email(recipient_email, candidate_name, date, time, location):
     """
     msg.set_content(body)
 
+    start = perf_counter()
     try:
         with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
             smtp.login(os.getenv("EMAIL_USER"), os.getenv("EMAIL_PASS"))
             smtp.send_message(msg)
         print(f"Email sent to: {recipient_email}")
     except Exception as e:
+        inc("hr_errors_total", operation="notification", channel="email")
         print(f"Email error for {candidate_name}: {e}")
+    observe("hr_notification_seconds", perf_counter() - start, channel="email")
 
 
 def send_appointment_letter_email(recipient_email, candidate_name, candidate_id, position_title, start_date, salary, department, probation_months, pdf_path=None):
@@ -129,6 +134,7 @@ Urmi Group
         else:
             print(f"⚠️ No PDF path provided to email function")
     
+    start = perf_counter()
     try:
         with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
             smtp.login(os.getenv("EMAIL_USER"), os.getenv("EMAIL_PASS"))
@@ -136,8 +142,11 @@ Urmi Group
         print(f"Appointment letter sent to: {recipient_email}")
         return True
     except Exception as e:
+        inc("hr_errors_total", operation="notification", channel="appointment_letter")
         print(f"Appointment letter email error for {candidate_name}: {e}")
         return False
+    finally:
+        observe("hr_notification_seconds", perf_counter() - start, channel="appointment_letter")
 
 
 def send_free_sms(phone_number, candidate_name, date, time):
@@ -148,6 +157,7 @@ def send_free_sms(phone_number, candidate_name, date, time):
     user = os.getenv("EMAIL_USER")
     password = os.getenv("EMAIL_PASS")
 
+    start = perf_counter()
     for gateway in SMS_GATEWAYS:
         msg = EmailMessage()
         msg['From'] = user
@@ -159,5 +169,7 @@ def send_free_sms(phone_number, candidate_name, date, time):
                 smtp.login(user, password)
                 smtp.send_message(msg)
         except:
+            inc("hr_errors_total", operation="notification", channel="sms")
             continue # Try next gateway if one fails
+    observe("hr_notification_seconds", perf_counter() - start, channel="sms")
     print(f"SMS alert triggered for {candidate_name}")
\ No newline at end of file
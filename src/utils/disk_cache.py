@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Project root (same convention as helpers.get_google_credentials)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+CACHE_DIR = os.getenv("HR_CACHE_DIR", os.path.join(BASE_DIR, "data", "cache"))
+
+
+class DiskCache:
+    """
+    Small persistent key/value cache backed by a SQLite file.
+
+    Values are stored as JSON. Entries can expire after a TTL and the store
+    can be bounded in size, in which case the least recently used entries are
+    evicted first. Hit/miss counters are persisted alongside the data so they
+    survive restarts and are shared between processes.
+
+    Args:
+        name: Cache name, used as the SQLite file name under CACHE_DIR
+        max_bytes: Maximum total size of stored values (None = unbounded)
+        ttl: Entry lifetime in seconds (None = never expires)
+        path: Explicit database path (overrides name/CACHE_DIR)
+    """
+
+    def __init__(self, name, max_bytes=None, ttl=None, path=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = path or os.path.join(CACHE_DIR, f"{name}.sqlite3")
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        if not self._initialized:
+            with self._lock:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT NOT NULL,"
+                    " size INTEGER NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " accessed_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+                conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+                conn.execute("INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    def _bump(self, conn, stat, amount=1):
+        conn.execute("UPDATE stats SET value = value + ? WHERE name = ?", (amount, stat))
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss/expired entry."""
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"⚠️  Cache '{self.name}' unavailable: {e}")
+            return None
+
+        try:
+            with conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                now = time.time()
+
+                if row and self.ttl is not None and now - row[1] > self.ttl:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    row = None
+
+                if row is None:
+                    self._bump(conn, "misses")
+                    return None
+
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                self._bump(conn, "hits")
+                return json.loads(row[0])
+        except sqlite3.Error as e:
+            print(f"⚠️  Cache '{self.name}' read failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def set(self, key, value):
+        """Store a JSON-serializable value under key."""
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"⚠️  Cache '{self.name}' unavailable: {e}")
+            return
+
+        try:
+            with conn:
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, size, now, now)
+                )
+                if self.max_bytes is not None:
+                    self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"⚠️  Cache '{self.name}' write failed: {e}")
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        """Drop least recently used entries until the store fits in max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+
+        self._bump(conn, "evictions", evicted)
+
+    def delete(self, key):
+        """Remove a single entry."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        finally:
+            conn.close()
+
+    def keys(self):
+        """Return all stored keys."""
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute("SELECT key FROM entries")]
+        finally:
+            conn.close()
+
+    def get_meta(self, name):
+        """Read a small metadata value (not subject to TTL, eviction or counters)."""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+            return row[0] if row else None
+        finally:
+            conn.close()
+
+    def set_meta(self, name, value):
+        """Write a small metadata value."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+        finally:
+            conn.close()
+
+    def clear(self):
+        """Remove all entries (counters are kept)."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM entries")
+        finally:
+            conn.close()
+
+    def stats(self):
+        """Return entry count, stored bytes and hit/miss/eviction counters."""
+        conn = self._connect()
+        try:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        finally:
+            conn.close()
+
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            "name": self.name,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": round(counters.get("hits", 0) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,371 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from .disk_cache import CACHE_DIR
+
+# Set to 0 to turn all instrumentation into no-ops
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Seconds between writes of buffered metric updates to the store
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "1"))
+
+# Histogram bucket upper bounds in seconds (+Inf is implied)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Histograms that are not latencies, with their own bucket bounds
+METRIC_BUCKETS = {
+    "hr_ocr_confidence": (0.3, 0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 1),
+}
+
+# HELP/TYPE lines for the metrics recorded across the pipeline
+METRIC_HELP = {
+    "hr_extract_seconds": ("histogram", "Time to extract text from one PDF"),
+    "hr_pages_total": ("counter", "PDF pages extracted, by source (text or ocr)"),
+    "hr_ocr_render_seconds": ("histogram", "Time to rasterize one page for Vision OCR"),
+    "hr_ocr_crop_seconds": ("histogram", "Time to deskew and crop one page image to its text regions"),
+    "hr_ocr_pixels_saved_total": ("counter", "Page image pixels not sent to Vision OCR thanks to text-region cropping"),
+    "hr_ocr_backend_seconds": ("histogram", "Time for one OCR backend to read one page"),
+    "hr_ocr_confidence": ("histogram", "Confidence (0-1) reported by local OCR backends per page"),
+    "hr_ocr_pages_by_backend_total": ("counter", "OCR pages by backend and outcome (accepted or fallback)"),
+    "hr_ocr_image_bytes_total": ("counter", "Bytes of page images sent to Vision OCR, by detail (low or high)"),
+    "hr_llm_request_seconds": ("histogram", "OpenAI chat completion latency"),
+    "hr_llm_tokens_total": ("counter", "OpenAI tokens used, by kind and type (prompt, completion, or cached prompt)"),
+    "hr_score_cache_total": ("counter", "Score cache lookups, by result (hit or miss)"),
+    "hr_rate_limit_wait_seconds": ("histogram", "Time scoring requests waited for the RPM/TPM limiter"),
+    "hr_notification_seconds": ("histogram", "Time to send one notification"),
+    "hr_analysis_stage_seconds": ("histogram", "Time spent per analysis pipeline stage"),
+    "hr_analysis_items_total": ("counter", "Analysis items checkpointed as scored or failed, by state"),
+    "hr_errors_total": ("counter", "Failed operations"),
+    "hr_retries_total": ("counter", "Retried operations"),
+}
+
+
+def bucket_label(bound):
+    return 'le="%g"' % bound
+
+
+INF_LABEL = 'le="+Inf"'
+
+
+def _label_string(labels):
+    """Canonical Prometheus label set, e.g. kind="scoring",type="prompt"."""
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+    return ",".join(f'{key}="{escape(value)}"' for key, value in sorted(labels.items()))
+
+
+class MetricsStore:
+    """
+    Counters and histograms shared between processes through a SQLite file.
+
+    The web server, the analysis worker and its extraction processes all
+    record into the same store, and the /metrics endpoint renders it in the
+    Prometheus text format. Recording never raises: a broken store only
+    prints a warning.
+
+    Updates are added up in memory and written by a background thread every
+    flush_seconds (and at exit), so recording from the scoring engine's
+    event loop never waits on disk. Reads flush first.
+
+    Args:
+        path: SQLite file (defaults to metrics.sqlite3 under CACHE_DIR)
+        buckets: Histogram bucket upper bounds (METRIC_BUCKETS overrides them per metric)
+        flush_seconds: Interval between background writes (0 = write on every update)
+    """
+
+    def __init__(self, path=None, buckets=LATENCY_BUCKETS, flush_seconds=METRICS_FLUSH_SECONDS):
+        self.path = path or os.path.join(CACHE_DIR, "metrics.sqlite3")
+        self.buckets = tuple(buckets)
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset_pending()
+        atexit.register(self.flush)
+
+    def _reset_pending(self):
+        self._pid = os.getpid()
+        self._counters = {}  # (name, labels) -> amount
+        self._buckets_pending = {}  # (name, labels, bucket) -> count
+        self._totals = {}  # (name, labels) -> [sum, count]
+        self._flusher = None
+
+    def _buckets(self, name):
+        return METRIC_BUCKETS.get(name, self.buckets)
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._initialized:
+            with self._lock:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS counters ("
+                    " name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL,"
+                    " PRIMARY KEY (name, labels))"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS histograms ("
+                    " name TEXT NOT NULL, labels TEXT NOT NULL, bucket INTEGER NOT NULL, count INTEGER NOT NULL,"
+                    " PRIMARY KEY (name, labels, bucket))"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS histogram_totals ("
+                    " name TEXT NOT NULL, labels TEXT NOT NULL, sum REAL NOT NULL, count INTEGER NOT NULL,"
+                    " PRIMARY KEY (name, labels))"
+                )
+                conn.commit()
+                self._initialized = True
+        return conn
+
+    def _write(self, statements):
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"⚠️  Metrics store unavailable: {e}")
+            return
+
+        try:
+            with conn:
+                for sql, params in statements:
+                    conn.execute(sql, params)
+        except sqlite3.Error as e:
+            print(f"⚠️  Metrics write failed: {e}")
+        finally:
+            conn.close()
+
+    def _pending(self):
+        """Buffers of this process (a forked child starts with empty ones and its own flusher)."""
+        if self._pid != os.getpid():
+            self._reset_pending()
+        if self._flusher is None and self.flush_seconds > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def inc(self, name, amount=1, **labels):
+        """Add amount to a counter."""
+        key = (name, _label_string(labels))
+        with self._pending_lock:
+            self._pending()
+            self._counters[key] = self._counters.get(key, 0) + amount
+        if not self.flush_seconds:
+            self.flush()
+
+    def observe(self, name, value, **labels):
+        """Record one histogram observation."""
+        label_string = _label_string(labels)
+        buckets = self._buckets(name)
+        bucket = next((index for index, bound in enumerate(buckets) if value <= bound), len(buckets))
+        with self._pending_lock:
+            self._pending()
+            key = (name, label_string, bucket)
+            self._buckets_pending[key] = self._buckets_pending.get(key, 0) + 1
+            total = self._totals.setdefault((name, label_string), [0.0, 0])
+            total[0] += value
+            total[1] += 1
+        if not self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered updates to the store in one transaction."""
+        with self._flush_lock:
+            with self._pending_lock:
+                if self._pid != os.getpid():
+                    self._reset_pending()
+                counters, buckets, totals = self._counters, self._buckets_pending, self._totals
+                self._counters, self._buckets_pending, self._totals = {}, {}, {}
+            if not (counters or buckets or totals):
+                return
+
+            statements = [
+                (
+                    "INSERT INTO counters (name, labels, value) VALUES (?, ?, ?)"
+                    " ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value",
+                    (name, label_string, amount)
+                )
+                for (name, label_string), amount in counters.items()
+            ]
+            statements += [
+                (
+                    "INSERT INTO histograms (name, labels, bucket, count) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (name, labels, bucket) DO UPDATE SET count = count + excluded.count",
+                    (name, label_string, bucket, count)
+                )
+                for (name, label_string, bucket), count in buckets.items()
+            ]
+            statements += [
+                (
+                    "INSERT INTO histogram_totals (name, labels, sum, count) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (name, labels) DO UPDATE SET sum = sum + excluded.sum, count = count + excluded.count",
+                    (name, label_string, total, count)
+                )
+                for (name, label_string), (total, count) in totals.items()
+            ]
+            self._write(statements)
+
+    def _read_one(self, sql, params):
+        self.flush()
+        try:
+            conn = self._connect()
+            try:
+                return conn.execute(sql, params).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"⚠️  Metrics read failed: {e}")
+            return None
+
+    def mean(self, name, **labels):
+        """Average of a histogram's observations, or None if nothing was recorded."""
+        row = self._read_one(
+            "SELECT sum, count FROM histogram_totals WHERE name = ? AND labels = ?", (name, _label_string(labels))
+        )
+        return row[0] / row[1] if row and row[1] else None
+
+    def count(self, name, **labels):
+        """Number of a histogram's observations (0 if nothing was recorded)."""
+        row = self._read_one(
+            "SELECT count FROM histogram_totals WHERE name = ? AND labels = ?", (name, _label_string(labels))
+        )
+        return row[0] if row else 0
+
+    def value(self, name, **labels):
+        """Current value of a counter (0 if nothing was recorded)."""
+        row = self._read_one(
+            "SELECT value FROM counters WHERE name = ? AND labels = ?", (name, _label_string(labels))
+        )
+        return row[0] if row else 0
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        self.flush()
+        conn = self._connect()
+        try:
+            counters = conn.execute("SELECT name, labels, value FROM counters ORDER BY name, labels").fetchall()
+            buckets = conn.execute("SELECT name, labels, bucket, count FROM histograms").fetchall()
+            totals = conn.execute("SELECT name, labels, sum, count FROM histogram_totals ORDER BY name, labels").fetchall()
+        finally:
+            conn.close()
+
+        lines = []
+        described = set()
+
+        def describe(name, default_type):
+            if name in described:
+                return
+            described.add(name)
+            metric_type, help_text = METRIC_HELP.get(name, (default_type, name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        def series(name, label_string, extra=""):
+            joined = ",".join(part for part in (label_string, extra) if part)
+            return f"{name}{{{joined}}}" if joined else name
+
+        for name, label_string, value in counters:
+            describe(name, "counter")
+            lines.append(f"{series(name, label_string)} {value:g}")
+
+        bucket_counts = {}
+        for name, label_string, bucket, count in buckets:
+            bucket_counts.setdefault((name, label_string), {})[bucket] = count
+
+        for name, label_string, total, count in totals:
+            describe(name, "histogram")
+            counts = bucket_counts.get((name, label_string), {})
+            cumulative = 0
+            for index, bound in enumerate(self._buckets(name)):
+                cumulative += counts.get(index, 0)
+                lines.append(f"{series(name + '_bucket', label_string, bucket_label(bound))} {cumulative}")
+            lines.append(f"{series(name + '_bucket', label_string, INF_LABEL)} {count}")
+            lines.append(f"{series(name + '_sum', label_string)} {total:g}")
+            lines.append(f"{series(name + '_count', label_string)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded metrics."""
+        self.flush()
+        conn = self._connect()
+        try:
+            with conn:
+                for table in ("counters", "histograms", "histogram_totals"):
+                    conn.execute(f"DELETE FROM {table}")
+        finally:
+            conn.close()
+
+
+metrics = MetricsStore()
+
+
+def inc(name, amount=1, **labels):
+    """Add amount to a counter (no-op when METRICS_ENABLED is off)."""
+    if METRICS_ENABLED and amount:
+        metrics.inc(name, amount, **labels)
+
+
+def observe(name, value, **labels):
+    """Record a histogram observation (no-op when METRICS_ENABLED is off)."""
+    if METRICS_ENABLED:
+        metrics.observe(name, value, **labels)
+
+
+@contextmanager
+def timed(name, **labels):
+    """
+    Time a block into histogram name. If the block raises, hr_errors_total
+    is incremented for operation=name before the exception propagates.
+
+    Usage:
+        with timed("hr_notification_seconds", channel="email"):
+            ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc("hr_errors_total", operation=name, **labels)
+        raise
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def record_usage(response, kind):
+    """Count the prompt/completion tokens reported by an OpenAI response."""
+    usage = getattr(response, "usage", None)
+    if usage:
+        inc("hr_llm_tokens_total", usage.prompt_tokens or 0, kind=kind, type="prompt")
+        inc("hr_llm_tokens_total", usage.completion_tokens or 0, kind=kind, type="completion")
+        details = getattr(usage, "prompt_tokens_details", None)
+        inc("hr_llm_tokens_total", getattr(details, "cached_tokens", 0) or 0, kind=kind, type="cached")
+
+
+def observed_mean(name, **labels):
+    """Average recorded value of a histogram (None when metrics are off or empty)."""
+    return metrics.mean(name, **labels) if METRICS_ENABLED else None
+
+
+def observed_count(name, **labels):
+    """Number of recorded observations of a histogram (0 when metrics are off)."""
+    return metrics.count(name, **labels) if METRICS_ENABLED else 0
+
+
+def observed_value(name, **labels):
+    """Recorded value of a counter (0 when metrics are off)."""
+    return metrics.value(name, **labels) if METRICS_ENABLED else 0
+
+
+def render_prometheus():
+    """Prometheus text format of all recorded metrics."""
+    return metrics.render()
@@ -0,0 +1,87 @@
+import os
+
+
+def estimate_tokens(text):
+    """
+    Rough local token count for OpenAI chat models (~4 characters per token).
+    Good enough for rate limiting and budgeting without a tokenizer dependency.
+    """
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+
+def estimate_message_tokens(messages):
+    """Estimate prompt tokens for a list of chat messages (string content only)."""
+    total = 3  # every reply is primed with <|start|>assistant<|message|>
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        total += 4 + estimate_tokens(content)
+    return total
+
+
+# USD per 1M (prompt, completion) tokens; OPENAI_PROMPT_PRICE / OPENAI_COMPLETION_PRICE override these
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+# Prompt tokens served from the provider's prompt cache are billed at a discount
+CACHED_PROMPT_PRICE_FACTOR = float(os.getenv("OPENAI_CACHED_PROMPT_PRICE_FACTOR", "0.5"))
+
+# Batch API requests are billed at a discount
+BATCH_PRICE_FACTOR = float(os.getenv("OPENAI_BATCH_PRICE_FACTOR", "0.5"))
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, price_factor=1.0, cached_tokens=0):
+    """
+    Estimated USD cost of a request from its token counts.
+
+    cached_tokens is the part of prompt_tokens read from the prompt cache.
+    Unknown models cost 0 unless OPENAI_PROMPT_PRICE/OPENAI_COMPLETION_PRICE are set.
+    """
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    prompt_price = float(os.getenv("OPENAI_PROMPT_PRICE") or prompt_price)
+    completion_price = float(os.getenv("OPENAI_COMPLETION_PRICE") or completion_price)
+    billed_prompt = prompt_tokens - cached_tokens + cached_tokens * CACHED_PROMPT_PRICE_FACTOR
+    cost = (billed_prompt * prompt_price + completion_tokens * completion_price) / 1_000_000
+    return cost * price_factor
+
+
+def usage_from_response(usage, model, price_factor=1.0):
+    """
+    Token counts and estimated cost of one API call.
+
+    Args:
+        usage: The response's usage block (object or dict, as in Batch API output)
+        model: Model the request was billed for
+        price_factor: Discount applied to the list price (e.g. BATCH_PRICE_FACTOR)
+
+    Returns:
+        dict with 'prompt_tokens', 'completion_tokens', 'cached_tokens'
+        (prompt tokens read from the prompt cache) and 'cost'
+    """
+    def field(source, name):
+        if isinstance(source, dict):
+            return source.get(name) or 0
+        return getattr(source, name, 0) or 0
+
+    prompt_tokens = field(usage, "prompt_tokens")
+    completion_tokens = field(usage, "completion_tokens")
+    details = usage.get("prompt_tokens_details") if isinstance(usage, dict) else getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = field(details, "cached_tokens") if details else 0
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cached_tokens": cached_tokens,
+        "cost": estimate_cost(model, prompt_tokens, completion_tokens, price_factor, cached_tokens),
+    }
+
+
+def add_usage(total, usage):
+    """Add one usage dict into a running total (both as returned by usage_from_response)."""
+    for key in ("prompt_tokens", "completion_tokens", "cached_tokens", "cost"):
+        total[key] = total.get(key, 0) + (usage or {}).get(key, 0)
+    return total